@@ -0,0 +1,192 @@
+import array
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+PASTA_ARMAZEM = Path("resultados") / "armazem"
+
+# Colunas de cada tabela e o typecode do módulo array usado na gravação.
+# O leitor converte para o dtype equivalente do NumPy (DTYPES).
+COLUNAS_TAREFAS = {
+    "execucao": "q",
+    "id": "q",
+    "tipo": "h",
+    "prioridade": "b",
+    "cliente": "h",
+    "servidor": "i",
+    # Instantes em segundos desde o início da simulação: em float32 a resolução de
+    # milissegundos se perde depois de ~4,6 h (2^24 ms), o que atinge execuções longas
+    "criacao": "d",
+    "chegada": "d",
+    "despacho": "d",
+    "retirada": "d",
+    "inicio": "d",
+    "fim": "d",
+    "recebido": "d",
+}
+
+COLUNAS_EXECUCOES = {
+    "execucao": "q",
+    "inicio": "d",
+    "politica": "h",
+    "tarefas_processadas": "q",
+    "tempo_total_simulacao": "f",
+    "tempo_medio_espera": "f",
+    "tempo_maximo_espera": "f",
+    "tempo_medio_execucao": "f",
+    "tempo_medio_resposta": "f",
+    "tempo_resposta_p95": "f",
+    "tempo_resposta_p99": "f",
+    "throughput": "f",
+    "utilizacao_media_cpu": "f",
+}
+
+TABELAS = {"tarefas": COLUNAS_TAREFAS, "execucoes": COLUNAS_EXECUCOES}
+
+# Colunas de texto gravadas como códigos inteiros + dicionário no meta.json do segmento
+COLUNAS_DICIONARIO = {"tipo", "cliente", "politica"}
+
+DTYPES = {"q": "i8", "i": "i4", "h": "i2", "b": "i1", "f": "f4", "d": "f8"}
+
+
+class EscritorColunar:
+    """
+    Grava uma tabela em formato colunar, um arquivo binário por coluna, dentro de um
+    segmento exclusivo da execução (ex.: resultados/armazem/tarefas/<execucao>/).
+    As linhas ficam em buffers e são anexadas ao disco em blocos de tamanho_bloco.
+    O meta.json só é escrito em fechar(), então segmentos incompletos são ignorados
+    pelo leitor.
+
+    Com retomar (o retorno de marcar_checkpoint()), um segmento interrompido é
+    reaberto: as linhas gravadas depois do checkpoint são descartadas e a gravação
+    continua a partir dele.
+    """
+    def __init__(self, pasta: Path, colunas: Dict[str, str], tamanho_bloco: int = 4096,
+                 retomar: Optional[Dict] = None):
+        self.pasta = Path(pasta)
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        self.colunas = colunas
+        self.tamanho_bloco = tamanho_bloco
+        self.buffers = {c: array.array(t) for c, t in colunas.items()}
+        self.dicionarios: Dict[str, Dict[str, int]] = {c: {} for c in colunas if c in COLUNAS_DICIONARIO}
+        self.linhas = 0
+        self.pendentes = 0
+
+        if retomar:
+            self.linhas = retomar["linhas"]
+            for c, valores in retomar["dicionarios"].items():
+                self.dicionarios[c] = {v: i for i, v in enumerate(valores)}
+        for c, t in colunas.items():
+            with open(self.pasta / f"{c}.bin", "ab") as f:
+                f.truncate(self.linhas * array.array(t).itemsize)
+
+    def adicionar(self, **valores):
+        for coluna, buffer in self.buffers.items():
+            valor = valores.get(coluna, 0)
+            if coluna in self.dicionarios:
+                valor = self.dicionarios[coluna].setdefault(str(valor), len(self.dicionarios[coluna]))
+            buffer.append(valor)
+
+        self.linhas += 1
+        self.pendentes += 1
+        if self.pendentes >= self.tamanho_bloco:
+            self.descarregar()
+
+    def descarregar(self):
+        if not self.pendentes:
+            return
+        for coluna, buffer in self.buffers.items():
+            with open(self.pasta / f"{coluna}.bin", "ab") as f:
+                buffer.tofile(f)
+            del buffer[:]
+        self.pendentes = 0
+
+    def marcar_checkpoint(self) -> Dict:
+        self.descarregar()
+        return {
+            "linhas": self.linhas,
+            "dicionarios": {
+                c: [v for v, _ in sorted(d.items(), key=lambda item: item[1])]
+                for c, d in self.dicionarios.items()
+            },
+        }
+
+    def fechar(self, meta: Optional[Dict] = None):
+        conteudo = {
+            **self.marcar_checkpoint(),
+            "colunas": self.colunas,
+            "byteorder": sys.byteorder,
+            **(meta or {}),
+        }
+        with open(self.pasta / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(conteudo, f, ensure_ascii=False)
+
+
+def registrar_execucao(metricas: Dict, execucao: int, inicio: float, pasta: Path = PASTA_ARMAZEM):
+    escritor = EscritorColunar(Path(pasta) / "execucoes" / str(execucao), COLUNAS_EXECUCOES, tamanho_bloco=1)
+    escritor.adicionar(
+        execucao=execucao,
+        inicio=inicio,
+        **{c: metricas.get(c, 0) for c in COLUNAS_EXECUCOES if c not in ("execucao", "inicio")},
+    )
+    escritor.fechar({"execucao": execucao})
+
+
+def ler_tabela(tabela: str,
+               pasta: Path = PASTA_ARMAZEM,
+               execucao: Optional[int] = None) -> Tuple[Dict, Dict[str, List[str]]]:
+    """
+    Lê todos os segmentos completos de uma tabela via np.memmap, sem copiar os dados
+    quando há um único segmento. Colunas de dicionário são convertidas para códigos
+    globais; o segundo valor retornado traz, para cada uma delas, a lista código -> texto.
+    Se execucao for informada, só são lidos os segmentos dessa execução (inclusive os
+    de cada shard, <execucao>-s<id>). Colunas adicionadas à tabela depois que um
+    segmento foi gravado aparecem zeradas nesse segmento.
+    """
+    import numpy as np
+
+    partes: Dict[str, list] = {}
+    dicionarios: Dict[str, Dict[str, int]] = {}
+    raiz = Path(pasta) / tabela
+
+    segmentos = sorted(raiz.iterdir()) if raiz.exists() else []
+    for segmento in segmentos:
+        if execucao is not None and segmento.name.split("-s")[0] != str(execucao):
+            continue
+        arquivo_meta = segmento / "meta.json"
+        if not arquivo_meta.exists():
+            continue
+        with open(arquivo_meta, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        ordem = "<" if meta["byteorder"] == "little" else ">"
+        colunas_tabela = {**TABELAS.get(tabela, {}), **meta["colunas"]}
+        for coluna, typecode in colunas_tabela.items():
+            dtype = np.dtype(ordem + DTYPES[typecode])
+            if coluna not in meta["colunas"]:
+                valores = np.zeros(meta["linhas"], dtype=dtype)
+            elif meta["linhas"]:
+                valores = np.memmap(segmento / f"{coluna}.bin", dtype=dtype, mode="r", shape=(meta["linhas"],))
+            else:
+                valores = np.empty(0, dtype=dtype)
+
+            if coluna in meta["dicionarios"]:
+                global_ = dicionarios.setdefault(coluna, {})
+                mapa = np.array(
+                    [global_.setdefault(v, len(global_)) for v in meta["dicionarios"][coluna]],
+                    dtype=np.int16,
+                )
+                valores = mapa[valores] if len(mapa) else valores
+
+            partes.setdefault(coluna, []).append(valores)
+
+    colunas = {
+        c: (p[0] if len(p) == 1 else np.concatenate(p))
+        for c, p in partes.items()
+    }
+    nomes = {
+        c: [v for v, _ in sorted(d.items(), key=lambda item: item[1])]
+        for c, d in dicionarios.items()
+    }
+    return colunas, nomes
@@ -0,0 +1,87 @@
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+from estatistica import percentil
+
+
+class JanelaDeslizante:
+    """Amostras (instante, valor) dos últimos `duracao` segundos."""
+    def __init__(self, duracao: float):
+        self.duracao = duracao
+        self.amostras: deque = deque()
+
+    def adicionar(self, instante: float, valor: float):
+        self.amostras.append((instante, valor))
+        self._podar(instante)
+
+    def _podar(self, agora: float):
+        while self.amostras and self.amostras[0][0] < agora - self.duracao:
+            self.amostras.popleft()
+
+    def media(self, agora: float) -> Optional[float]:
+        self._podar(agora)
+        if not self.amostras:
+            return None
+        return sum(v for _, v in self.amostras) / len(self.amostras)
+
+    def percentil(self, agora: float, p: float) -> Optional[float]:
+        self._podar(agora)
+        if not self.amostras:
+            return None
+        return percentil([v for _, v in self.amostras], p)
+
+
+class ControladorAutoescala:
+    """
+    Controlador de autoescala do orquestrador. A cada ciclo recebe a pressão da fila
+    (requisições na fila_pronta por vaga de capacidade) e a ocupação do cluster
+    (tarefas em execução / capacidade); a cada resultado, o tempo de espera da
+    requisição. Tudo fica em janelas deslizantes de `janela` segundos.
+
+    decidir() pede um servidor a mais quando a pressão média da fila passa de
+    limiar_fila ou o p95 da espera passa de limiar_espera_p95, e um a menos quando a
+    fila está praticamente vazia e a ocupação média fica abaixo de limiar_ociosidade.
+    Entre duas ações (e no início da simulação) há um cooldown, e o total de
+    servidores, contando os que ainda estão sendo provisionados, fica entre
+    min_servidores e max_servidores.
+    """
+    def __init__(self, cfg: Dict, inicio: float):
+        self.min_servidores = max(1, cfg.get("min_servidores", 1))
+        self.max_servidores = max(self.min_servidores, cfg.get("max_servidores", 6))
+        self.cooldown = cfg.get("cooldown", 4.0)
+        self.limiar_fila = cfg.get("limiar_fila", 1.0)
+        self.limiar_espera_p95 = cfg.get("limiar_espera_p95", 4.0)
+        self.limiar_ociosidade = cfg.get("limiar_ociosidade", 0.3)
+        janela = cfg.get("janela", 5.0)
+        self.pressao = JanelaDeslizante(janela)
+        self.ocupacao = JanelaDeslizante(janela)
+        self.espera = JanelaDeslizante(janela)
+        self.ultima_acao = inicio
+
+    def observar(self, agora: float, pressao: float, ocupacao: float):
+        self.pressao.adicionar(agora, pressao)
+        self.ocupacao.adicionar(agora, ocupacao)
+
+    def observar_espera(self, agora: float, espera: float):
+        self.espera.adicionar(agora, espera)
+
+    def decidir(self, agora: float, servidores: int) -> Tuple[int, str]:
+        """Retorna +1 (provisionar), -1 (aposentar) ou 0, com o motivo da decisão."""
+        if agora - self.ultima_acao < self.cooldown:
+            return 0, ""
+
+        pressao = self.pressao.media(agora) or 0.0
+        ocupacao = self.ocupacao.media(agora) or 0.0
+        espera_p95 = self.espera.percentil(agora, 95)
+
+        acao, motivo = 0, ""
+        if servidores < self.max_servidores and pressao > self.limiar_fila:
+            acao, motivo = 1, f"fila com {pressao:.2f} requisições por vaga"
+        elif servidores < self.max_servidores and espera_p95 is not None and espera_p95 > self.limiar_espera_p95:
+            acao, motivo = 1, f"p95 da espera em {espera_p95:.2f}s"
+        elif servidores > self.min_servidores and pressao < 0.05 and ocupacao < self.limiar_ociosidade:
+            acao, motivo = -1, f"ocupação média de {ocupacao * 100:.0f}%"
+
+        if acao:
+            self.ultima_acao = agora
+        return acao, motivo
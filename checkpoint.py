@@ -0,0 +1,215 @@
+import json
+import os
+import pickle
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+PASTA_CHECKPOINT = Path("resultados") / "checkpoint"
+ARQUIVO_ESTADO = "estado.pkl"
+ARQUIVO_CHEGADAS = "chegadas.jsonl"
+ARQUIVO_CONCLUIDAS = "concluidas.jsonl"
+
+
+class GerenciadorCheckpoint:
+    """
+    Checkpoint do orquestrador para simulações longas, em três partes:
+
+    - log de chegadas: cada requisição recebida pelo orquestrador é anexada a
+      chegadas.jsonl (uma linha JSON por Task) e o buffer é descarregado a cada
+      ciclo, então o log sobrevive à queda do processo;
+    - log de conclusões: cada requisição concluída é anexada a concluidas.jsonl
+      (id, tipo, cliente e tempo de resposta), da mesma forma. É dele que a
+      retomada reconstrói as tarefas concluídas e as amostras de latência, que
+      crescem com a execução e por isso ficam fora do snapshot;
+    - snapshot periódico: a cada intervalo segundos o restante do estado do
+      orquestrador (filas, tarefas em voo, contadores, cache), limitado pelo tamanho
+      da fila e do cluster, é gravado em estado.pkl junto com a posição dos dois
+      logs naquele instante. O estado é serializado com pickle no próprio laço, o
+      que fixa uma cópia consistente, e os bytes são gravados em disco por uma
+      thread, fora do laço.
+
+    Os arquivos ficam numa subpasta por execução (pasta_base/<execucao_id>), para
+    que execuções em paralelo não sobrescrevam nem apaguem o checkpoint umas das
+    outras.
+
+    Se um snapshot pausar o laço por mais de pausa_max_ms, o intervalo até o
+    próximo é esticado na mesma proporção, o que limita a fração do tempo do laço
+    gasta em snapshots a pausa_max_ms / intervalo.
+
+    Não usamos os.fork() para o snapshot: o orquestrador tem threads vivas (as
+    feeder threads das filas do multiprocessing), e um filho criado por fork herda
+    locks que essas threads podem estar segurando, o que pode travá-lo.
+
+    Ao final de uma execução completa, os arquivos são removidos.
+    """
+    def __init__(self, pasta: Path, intervalo: float, posicao_log: Optional[int] = None,
+                 posicao_concluidas: Optional[int] = None, pausa_max_ms: float = 50.0):
+        self.pasta = Path(pasta)
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        self.intervalo = intervalo
+        self.intervalo_efetivo = intervalo
+        self.pausa_max_ms = pausa_max_ms
+        self.ultimo = 0.0  # o primeiro snapshot é gravado logo no primeiro ciclo
+        self.snapshots = 0
+        self.acima_limite = 0
+        self.pausas_ms: List[float] = []
+        self.bytes_snapshot = 0
+        self.escritor: Optional[threading.Thread] = None
+
+        if posicao_log is None:
+            (self.pasta / ARQUIVO_ESTADO).unlink(missing_ok=True)
+            self.log = open(self.pasta / ARQUIVO_CHEGADAS, "w", encoding="utf-8")
+            self.log_concluidas = open(self.pasta / ARQUIVO_CONCLUIDAS, "w", encoding="utf-8")
+        else:
+            # Na retomada, o que foi registrado depois do snapshot é descartado: as
+            # chegadas são reenviadas ao orquestrador e voltam a ser registradas quando
+            # chegam, e as conclusões se repetem quando as requisições são executadas de novo
+            self.log = self._reabrir(ARQUIVO_CHEGADAS, posicao_log)
+            self.log_concluidas = self._reabrir(ARQUIVO_CONCLUIDAS, posicao_concluidas)
+
+    def _reabrir(self, nome: str, posicao: int):
+        arquivo = open(self.pasta / nome, "a", encoding="utf-8")
+        arquivo.truncate(posicao)
+        arquivo.seek(posicao)
+        return arquivo
+
+    def registrar_chegada(self, task):
+        self.log.write(json.dumps({"instante": time.time(), "task": asdict(task)}, ensure_ascii=False) + "\n")
+
+    def registrar_conclusao(self, task_id: int, tipo: str, cliente: str, resposta: float):
+        # Lista em vez de objeto: uma linha por requisição concluída, em execuções de horas
+        self.log_concluidas.write(json.dumps([task_id, tipo, cliente, resposta], ensure_ascii=False) + "\n")
+
+    def descarregar(self):
+        self.log.flush()
+        self.log_concluidas.flush()
+
+    def vencido(self) -> bool:
+        return time.time() - self.ultimo >= self.intervalo_efetivo
+
+    def salvar(self, estado: Dict) -> float:
+        """Grava um snapshot e retorna a pausa causada no laço, em ms."""
+        inicio = time.perf_counter()
+        self.descarregar()
+        estado["posicao_log"] = self.log.tell()
+        estado["posicao_concluidas"] = self.log_concluidas.tell()
+        estado["instante"] = time.time()
+
+        dados = pickle.dumps(estado, protocol=pickle.HIGHEST_PROTOCOL)
+        # Um snapshot por vez: se a gravação anterior ainda não terminou, espera por ela
+        self._aguardar_escritor()
+        self.escritor = threading.Thread(target=self._gravar, args=(dados,), daemon=True)
+        self.escritor.start()
+
+        pausa = (time.perf_counter() - inicio) * 1000
+        self.pausas_ms.append(pausa)
+        self.bytes_snapshot = len(dados)
+        self.snapshots += 1
+        if pausa > self.pausa_max_ms:
+            self.acima_limite += 1
+        self.intervalo_efetivo = self.intervalo * max(1.0, pausa / self.pausa_max_ms)
+        self.ultimo = time.time()
+        return pausa
+
+    def _gravar(self, dados: bytes):
+        temporario = self.pasta / (ARQUIVO_ESTADO + ".tmp")
+        with open(temporario, "wb") as f:
+            f.write(dados)
+        os.replace(temporario, self.pasta / ARQUIVO_ESTADO)
+
+    def _aguardar_escritor(self):
+        if self.escritor is not None:
+            self.escritor.join()
+            self.escritor = None
+
+    def finalizar(self, concluida: bool):
+        self._aguardar_escritor()
+        self.log.close()
+        self.log_concluidas.close()
+        if concluida:
+            for nome in (ARQUIVO_ESTADO, ARQUIVO_CHEGADAS, ARQUIVO_CONCLUIDAS):
+                (self.pasta / nome).unlink(missing_ok=True)
+            try:
+                self.pasta.rmdir()
+            except OSError:
+                pass  # a pasta tem outros arquivos além dos do checkpoint
+
+    def resumo(self) -> Dict:
+        return {
+            "snapshots": self.snapshots,
+            "pausa_media_ms": round(sum(self.pausas_ms) / len(self.pausas_ms), 3) if self.pausas_ms else 0.0,
+            "pausa_max_ms": round(max(self.pausas_ms, default=0.0), 3),
+            "pausa_limite_ms": self.pausa_max_ms,
+            "acima_limite": self.acima_limite,
+            "intervalo_efetivo": round(self.intervalo_efetivo, 2),
+            "bytes_ultimo_snapshot": self.bytes_snapshot,
+        }
+
+
+def pasta_execucao(pasta_base: Path, execucao_id: int) -> Path:
+    return Path(pasta_base) / str(execucao_id)
+
+
+def localizar_checkpoint(pasta_base: Path = PASTA_CHECKPOINT, execucao_id: Optional[int] = None) -> Optional[Path]:
+    """
+    Pasta do checkpoint a retomar: a da execução pedida ou, sem execucao_id, a do
+    snapshot gravado por último. Retorna None se não há snapshot.
+    """
+    if execucao_id is not None:
+        pasta = pasta_execucao(pasta_base, execucao_id)
+        return pasta if (pasta / ARQUIVO_ESTADO).exists() else None
+    estados = list(Path(pasta_base).glob(f"*/{ARQUIVO_ESTADO}"))
+    if not estados:
+        return None
+    return max(estados, key=lambda p: p.stat().st_mtime).parent
+
+
+def carregar_checkpoint(pasta: Path) -> Optional[Dict]:
+    """
+    Lê o último snapshot, as conclusões registradas até ele e as chegadas
+    registradas depois dele. Retorna None se não há snapshot (a execução não chegou
+    ao primeiro ciclo ou terminou normalmente). "instante" é o último momento
+    conhecido da execução interrompida (snapshot ou última chegada), "proximo_id" é
+    o primeiro id que o gerador ainda não usou e "concluidas" traz (id, tipo,
+    cliente, resposta) de cada requisição concluída até o snapshot.
+    """
+    pasta = Path(pasta)
+    if not (pasta / ARQUIVO_ESTADO).exists() or not (pasta / ARQUIVO_CHEGADAS).exists():
+        return None
+
+    with open(pasta / ARQUIVO_ESTADO, "rb") as f:
+        estado = pickle.load(f)
+    posicao = estado["posicao_log"]
+
+    chegadas = []
+    maior_id = 0
+    instante = estado["instante"]
+    with open(pasta / ARQUIVO_CHEGADAS, "rb") as f:
+        while True:
+            linha = f.readline()
+            if not linha.endswith(b"\n"):
+                # linha incompleta: o processo caiu no meio da escrita
+                break
+            registro = json.loads(linha)
+            maior_id = max(maior_id, registro["task"]["id"])
+            if f.tell() > posicao:
+                chegadas.append(registro["task"])
+                instante = max(instante, registro["instante"])
+
+    concluidas = []
+    with open(pasta / ARQUIVO_CONCLUIDAS, "rb") as f:
+        for linha in f.read(estado["posicao_concluidas"]).splitlines():
+            concluidas.append(tuple(json.loads(linha)))
+
+    return {
+        "estado": estado,
+        "chegadas": chegadas,
+        "concluidas": concluidas,
+        "posicao_concluidas": estado["posicao_concluidas"],
+        "instante": instante,
+        "posicao_log": posicao,
+        "proximo_id": maior_id + 1,
+    }
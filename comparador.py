@@ -1,23 +1,51 @@
 import subprocess
 import json
 import time
-import matplotlib.pyplot as plt
+import itertools
+import hashlib
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import numpy as np
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+
+from armazenamento import PASTA_ARMAZEM, COLUNAS_EXECUCOES, ler_tabela
+from instrumentacao import FASES_CICLO_VIDA
+
+METRICAS_CHAVE = [
+    "tarefas_processadas", "tempo_medio_resposta", "throughput",
+    "utilizacao_media_cpu", "tempo_medio_espera", "tempo_maximo_espera"
+]
+
+
+def carregar_pyplot():
+    """O matplotlib só é importado quando algum gráfico é de fato gerado."""
+    import matplotlib.pyplot as plt
+    return plt
+
 
 class ComparadorPoliticas:
-    def __init__(self, config_base: str = "config.json"):
+    def __init__(self, config_base: str = "config.json", semente: Optional[int] = None):
         self.config_base = config_base
-        self.politicas = ["round_robin", "sjf", "prioridade"]
+        self.politicas = ["round_robin", "sjf", "prioridade", "round_robin_quantum", "srtf"]
         self.resultados = {}
+        # Matriz (rodadas x METRICAS_CHAVE) por política
+        self.amostras: Dict[str, np.ndarray] = {}
+        self.testes_pareados = {}
+        self.rng = np.random.default_rng(semente)
+        self.num_reamostragens = 2000
+        # Processos de servidor reaproveitados entre as rodadas executadas neste processo
+        self.pool = None
         self.output_dir = Path("resultados")
         self.output_dir.mkdir(exist_ok=True)
         
         self.cores = {
             "round_robin": "#3498db",
             "sjf": "#2ecc71",
-            "prioridade": "#e74c3c"
+            "prioridade": "#e74c3c",
+            "round_robin_quantum": "#9b59b6",
+            "srtf": "#f39c12"
         }
 
     def carregar_config(self) -> Dict:
@@ -37,16 +65,165 @@ class ComparadorPoliticas:
         config["config"]["politica"] = politica
         self.salvar_config(config)
         
-        subprocess.run(["python", "main.py", "--auto"], check=True)
-        
-        time.sleep(1)
-        
+        import main as simulacao
+
+        execucao = time.time_ns() // 1000
+        simulacao.main(["--auto", "--execucao", str(execucao)], pool=self.obter_pool())
+
         try:
             with open("metricas.json", "r", encoding="utf-8") as f:
-                return json.load(f)
+                arquivo = json.load(f)
         except FileNotFoundError:
-            print(f"⚠️  Arquivo metricas.json não encontrado para {politica}")
+            arquivo = {}
+        if arquivo.get("execucao") != execucao:
+            arquivo = {}
+
+        # Blocos que não vão para o armazém (pools, cache, lote...) vêm do metricas.json da mesma execução
+        metricas = {**arquivo, **self.carregar_execucao(execucao)}
+        if not metricas:
+            print(f"⚠️  Execução {execucao} não encontrada no armazém para {politica}")
+        return metricas
+
+    def obter_pool(self):
+        if self.pool is None:
+            import main as simulacao
+            self.pool = simulacao.PoolServidores()
+        return self.pool
+
+    def encerrar_pool(self):
+        if self.pool is not None:
+            self.pool.encerrar()
+            self.pool = None
+
+    def medir_custo_rodada(self, rodadas: int = 5, politica: str = "round_robin") -> Dict:
+        """
+        Mede o custo fixo por rodada (tudo o que não é simulação) em três modos:
+        um interpretador novo por rodada, main() no mesmo processo criando os
+        servidores a cada rodada e main() no mesmo processo reaproveitando o pool.
+        O custo de uma rodada é o tempo de parede menos o tempo de simulação, somado
+        ao tempo de criação e encerramento dos servidores medido pelo orquestrador.
+        """
+        import main as simulacao
+
+        config = self.carregar_config()
+        config["config"].update({
+            "politica": politica,
+            "tempo_simulacao": 1,
+            "intervalo_chegada_min": 0.3,
+            "intervalo_chegada_max": 0.3,
+            "armazem": {"habilitado": False},
+        })
+        pasta = self.output_dir / "tmp_custo_rodada"
+        pasta.mkdir(exist_ok=True)
+        arquivo_config = pasta / "config.json"
+        arquivo_metricas = pasta / "metricas.json"
+        with open(arquivo_config, "w", encoding="utf-8") as f:
+            json.dump(config, f, ensure_ascii=False)
+        argv = ["--auto", "--config", str(arquivo_config), "--metricas", str(arquivo_metricas)]
+
+        pool = simulacao.PoolServidores()
+        modos = {
+            "interpretador_novo": lambda: subprocess.run(
+                [sys.executable, "main.py", *argv], stdout=subprocess.DEVNULL, check=True
+            ),
+            "processos_novos": lambda: simulacao.main(argv),
+            "pool": lambda: simulacao.main(argv, pool=pool),
+        }
+
+        custos = {}
+        try:
+            for modo, executar in modos.items():
+                amostras = []
+                for _ in range(rodadas):
+                    inicio = time.perf_counter()
+                    executar()
+                    parede = time.perf_counter() - inicio
+                    with open(arquivo_metricas, "r", encoding="utf-8") as f:
+                        m = json.load(f)
+                    amostras.append(
+                        parede - m["tempo_total_simulacao"]
+                        + m.get("tempo_preparacao_servidores", 0.0) + m.get("tempo_encerramento_servidores", 0.0)
+                    )
+                custos[modo] = np.array(amostras) * 1000
+        finally:
+            pool.encerrar()
+            arquivo_config.unlink(missing_ok=True)
+            arquivo_metricas.unlink(missing_ok=True)
+            pasta.rmdir()
+
+        resumo = {
+            modo: {"media_ms": round(float(v.mean()), 1), "mediana_ms": round(float(np.median(v)), 1)}
+            for modo, v in custos.items()
+        }
+        resumo["pool"]["processos_criados"] = pool.processos_criados
+        with open(self.output_dir / "custo_rodada.json", "w", encoding="utf-8") as f:
+            json.dump(resumo, f, indent=2, ensure_ascii=False)
+
+        print(f"\n{'Modo':<22} {'Média (ms)':>12} {'Mediana (ms)':>14}")
+        for modo, r in resumo.items():
+            print(f"{modo:<22} {r['media_ms']:>12.1f} {r['mediana_ms']:>14.1f}")
+        print(f"Processos criados pelo pool em {rodadas} rodadas: {pool.processos_criados}")
+        return resumo
+
+    def carregar_execucao(self, execucao: int, pasta: Path = PASTA_ARMAZEM) -> Dict:
+        """
+        Monta o dicionário de métricas de uma execução a partir do armazém colunar:
+        o resumo vem da tabela de execuções e a latência por tipo é recalculada
+        sobre os registros de tarefas mapeados em memória.
+        """
+        execucoes, nomes = ler_tabela("execucoes", pasta, execucao)
+        if not execucoes or not len(execucoes["execucao"]):
+            return {}
+
+        # As colunas de resumo são float32; arredonda como em salvar_metricas
+        metricas = {
+            c: round(execucoes[c][-1].item(), 2)
+            for c in COLUNAS_EXECUCOES if c not in ("execucao", "inicio", "politica")
+        }
+        metricas["politica"] = nomes["politica"][execucoes["politica"][-1]]
+
+        tarefas, nomes_tarefas = ler_tabela("tarefas", pasta, execucao)
+        if tarefas:
+            metricas["latencia_por_tipo"] = self.latencia_por_grupo(tarefas, "tipo", nomes_tarefas["tipo"])
+            metricas["ciclo_vida"] = self.decompor_latencia(tarefas)
+            if nomes_tarefas.get("cliente", ["padrao"]) != ["padrao"]:
+                por_cliente = self.latencia_por_grupo(tarefas, "cliente", nomes_tarefas["cliente"])
+                for lat in por_cliente.values():
+                    lat["throughput"] = round(lat["tarefas"] / (metricas["tempo_total_simulacao"] or 1), 2)
+                metricas["latencia_por_cliente"] = por_cliente
+        return metricas
+
+    @staticmethod
+    def decompor_latencia(tarefas: Dict[str, np.ndarray]) -> Dict:
+        """Tempo médio (s) de cada fase do ciclo de vida, só com tarefas executadas em servidores."""
+        executadas = (tarefas["servidor"] >= 0) & (tarefas["recebido"] > 0)
+        if not executadas.any():
             return {}
+        return {
+            fase: round(float(np.mean(tarefas[fim][executadas] - tarefas[inicio][executadas])), 4)
+            for fase, inicio, fim in FASES_CICLO_VIDA
+        }
+
+    @staticmethod
+    def latencia_por_grupo(tarefas: Dict[str, np.ndarray], coluna: str, nomes: List[str]) -> Dict:
+        """Latência de resposta agrupada por uma coluna de dicionário (tipo ou cliente)."""
+        respostas = tarefas["fim"].astype(np.float64) - tarefas["criacao"]
+        codigos = tarefas[coluna]
+        ordem = np.argsort(codigos, kind="stable")
+        codigos_ordenados = codigos[ordem]
+        presentes, inicios = np.unique(codigos_ordenados, return_index=True)
+
+        latencias = {}
+        for codigo, grupo in zip(presentes, np.split(respostas[ordem], inicios[1:])):
+            p50, p95, p99 = np.percentile(grupo, [50, 95, 99], method="inverted_cdf")
+            latencias[nomes[codigo]] = {
+                "tarefas": int(len(grupo)),
+                "media": round(float(grupo.mean()), 2),
+                "p50": round(float(p50), 2),
+                "p95": round(float(p95), 2),
+                "p99": round(float(p99), 2),
+            }
+        return dict(sorted(latencias.items()))
 
     def executar_multiplas_rodadas(self, num_rodadas: int = 3):
         print("\n" + "="*70)
@@ -65,24 +242,599 @@ class ComparadorPoliticas:
                 time.sleep(1)
             
             if rodadas:
+                self.amostras[politica] = self.montar_matriz(rodadas)
                 self.resultados[politica] = self.calcular_estatisticas(rodadas)
                 self.salvar_resultado_individual(politica, self.resultados[politica])
+
+        self.comparar_politicas()
     
-    def calcular_estatisticas(self, rodadas: List[Dict]) -> Dict:
-        metricas_chave = [
-            "tarefas_processadas", "tempo_medio_resposta", "throughput",
-            "utilizacao_media_cpu", "tempo_medio_espera", "tempo_maximo_espera"
+    def comparar_pools(self, politica: str = "sjf", num_rodadas: int = 1) -> Dict:
+        """
+        Executa a mesma carga com fila única e com escalonamento em dois níveis (pools
+        com afinidade de tipo) e compara utilização e latência de cada pool. Usa os
+        grupos definidos em "pools" no config.json.
+        """
+        config_original = self.carregar_config()
+        if not config_original["config"].get("pools", {}).get("grupos"):
+            print("⚠️  Nenhum pool definido em config.json (chave pools.grupos)")
+            return {}
+
+        comparacao = {}
+        try:
+            for modo, habilitado in (("fila_unica", False), ("dois_niveis", True)):
+                config = self.carregar_config()
+                config["config"]["pools"] = {**config["config"]["pools"], "habilitado": habilitado}
+                self.salvar_config(config)
+
+                rodadas = [self.executar_simulacao(politica, i) for i in range(1, num_rodadas + 1)]
+                rodadas = [r["pools"] for r in rodadas if r.get("pools")]
+                if not rodadas:
+                    continue
+                comparacao[modo] = {
+                    nome: {
+                        chave: float(np.mean([r[nome][chave] for r in rodadas]))
+                        for chave in ("utilizacao_media_cpu", "tempo_medio_resposta", "tempo_resposta_p95", "transbordadas")
+                    }
+                    for nome in rodadas[0]
+                }
+        finally:
+            self.salvar_config(config_original)
+            self.encerrar_pool()
+
+        with open(self.output_dir / "comparacao_pools.json", "w", encoding="utf-8") as f:
+            json.dump(comparacao, f, indent=2, ensure_ascii=False)
+
+        print(f"\n{'Pool':<12} {'Modo':<12} {'Utilização':>11} {'Resp. média':>12} {'p95':>8} {'Transb.':>8}")
+        for modo, pools in comparacao.items():
+            for nome, m in pools.items():
+                print(
+                    f"{nome:<12} {modo:<12} {m['utilizacao_media_cpu']:>10.1f}% {m['tempo_medio_resposta']:>11.2f}s "
+                    f"{m['tempo_resposta_p95']:>7.2f}s {m['transbordadas']:>8.1f}"
+                )
+        return comparacao
+
+    def comparar_clientes(self, politica: str = "round_robin", num_rodadas: int = 1) -> Dict:
+        """
+        Executa a mesma carga com vários clientes (definidos em "clientes" no
+        config.json, por exemplo um deles com taxa bem maior que os demais) com fila
+        única e com fila justa DRR, e compara throughput e latência de cada cliente.
+        O isolamento aparece na latência dos clientes bem-comportados.
+        """
+        config_original = self.carregar_config()
+        if not config_original["config"].get("clientes", {}).get("lista"):
+            print("⚠️  Nenhum cliente definido em config.json (chave clientes.lista)")
+            return {}
+
+        comparacao = {}
+        try:
+            for modo, fila_justa in (("fila_unica", False), ("fila_justa", True)):
+                config = self.carregar_config()
+                config["config"]["clientes"] = {
+                    **config["config"]["clientes"], "habilitado": True, "fila_justa": fila_justa,
+                }
+                self.salvar_config(config)
+
+                rodadas = [self.executar_simulacao(politica, i) for i in range(1, num_rodadas + 1)]
+                rodadas = [r["latencia_por_cliente"] for r in rodadas if r.get("latencia_por_cliente")]
+                if not rodadas:
+                    continue
+                clientes = sorted({c for r in rodadas for c in r})
+                comparacao[modo] = {
+                    cliente: {
+                        chave: float(np.mean([r[cliente][chave] for r in rodadas if cliente in r]))
+                        for chave in ("tarefas", "throughput", "media", "p95", "p99")
+                    }
+                    for cliente in clientes
+                }
+        finally:
+            self.salvar_config(config_original)
+            self.encerrar_pool()
+
+        with open(self.output_dir / "comparacao_clientes.json", "w", encoding="utf-8") as f:
+            json.dump(comparacao, f, indent=2, ensure_ascii=False)
+
+        print(f"\n{'Cliente':<12} {'Modo':<12} {'Tarefas':>8} {'Throughput':>11} {'Média':>8} {'p95':>8} {'p99':>8}")
+        for modo, clientes in comparacao.items():
+            for cliente, m in clientes.items():
+                print(
+                    f"{cliente:<12} {modo:<12} {m['tarefas']:>8.1f} {m['throughput']:>10.2f}/s "
+                    f"{m['media']:>7.2f}s {m['p95']:>7.2f}s {m['p99']:>7.2f}s"
+                )
+        return comparacao
+
+    def comparar_autoescala(self, politica: str = "round_robin", num_rodadas: int = 1) -> Dict:
+        """
+        Executa a mesma carga com a frota fixa do config.json e com a autoescala
+        habilitada (partindo dessa mesma frota) e compara custo em servidor-segundos
+        com a latência de resposta. Grava resultados/custo_latencia.json.
+        """
+        config_original = self.carregar_config()
+        if config_original["config"].get("sharding", {}).get("shards", 1) > 1:
+            # Com shards a autoescala é ignorada, e as duas variantes seriam a mesma frota fixa
+            print("⚠️  A autoescala não é suportada no modo com shards (sharding.shards > 1)")
+            return {}
+        comparacao = {}
+        try:
+            for modo, habilitado in (("frota_fixa", False), ("autoescala", True)):
+                config = self.carregar_config()
+                config["config"]["autoescala"] = {
+                    **config["config"].get("autoescala", {}), "habilitado": habilitado,
+                }
+                self.salvar_config(config)
+
+                rodadas = [self.executar_simulacao(politica, i) for i in range(1, num_rodadas + 1)]
+                rodadas = [r for r in rodadas if r.get("custo")]
+                if not rodadas:
+                    continue
+                comparacao[modo] = {
+                    "servidor_segundos": float(np.mean([r["custo"]["servidor_segundos"] for r in rodadas])),
+                    "servidores_medio": float(np.mean([r["custo"]["servidores_medio"] for r in rodadas])),
+                    "por_tarefa": float(np.mean([r["custo"]["servidor_segundos_por_tarefa"] for r in rodadas])),
+                    "media": float(np.mean([r["tempo_medio_resposta"] for r in rodadas])),
+                    "p95": float(np.mean([r["tempo_resposta_p95"] for r in rodadas])),
+                    "p99": float(np.mean([r["tempo_resposta_p99"] for r in rodadas])),
+                }
+        finally:
+            self.salvar_config(config_original)
+            self.encerrar_pool()
+
+        with open(self.output_dir / "custo_latencia.json", "w", encoding="utf-8") as f:
+            json.dump(comparacao, f, indent=2, ensure_ascii=False)
+
+        print(f"\n{'Modo':<12} {'Serv.-seg':>10} {'Serv. médio':>12} {'Por tarefa':>11} {'Média':>8} {'p95':>8} {'p99':>8}")
+        for modo, m in comparacao.items():
+            print(
+                f"{modo:<12} {m['servidor_segundos']:>10.1f} {m['servidores_medio']:>12.2f} {m['por_tarefa']:>11.2f} "
+                f"{m['media']:>7.2f}s {m['p95']:>7.2f}s {m['p99']:>7.2f}s"
+            )
+        return comparacao
+
+    def executar_curva_lote(self, tamanhos: Optional[List[int]] = None, politica: str = "sjf"):
+        if tamanhos is None:
+            tamanhos = [1, 2, 4, 8]
+        config_original = self.carregar_config()
+        pontos = []
+
+        try:
+            for tamanho in tamanhos:
+                config = self.carregar_config()
+                config["config"]["lote"] = {
+                    **config["config"].get("lote", {}),
+                    "habilitado": tamanho > 1,
+                    "tamanho_max": tamanho,
+                }
+                self.salvar_config(config)
+
+                metricas = self.executar_simulacao(politica)
+                if metricas:
+                    pontos.append((tamanho, metricas["throughput"], metricas["tempo_medio_resposta"]))
+                time.sleep(1)
+        finally:
+            self.salvar_config(config_original)
+
+        if not pontos:
+            print("⚠️  Nenhum resultado disponível para a curva de lotes")
+            return pontos
+
+        with open(self.output_dir / "curva_lote.json", "w", encoding="utf-8") as f:
+            json.dump(
+                [{"tamanho_max": t, "throughput": th, "tempo_medio_resposta": r} for t, th, r in pontos],
+                f, indent=2, ensure_ascii=False
+            )
+
+        plt = carregar_pyplot()
+        fig, ax = plt.subplots(figsize=(8, 6))
+        ax.plot([p[1] for p in pontos], [p[2] for p in pontos], marker='o',
+                color=self.cores.get(politica, '#95a5a6'), linewidth=2, zorder=3)
+        for tamanho, throughput, resposta in pontos:
+            ax.annotate(f'lote={tamanho}', xy=(throughput, resposta),
+                        xytext=(5, 5), textcoords="offset points", fontsize=9)
+        self._configurar_ax(ax, 'Lotes: Latência x Throughput', 'Tempo Médio de Resposta (s)')
+        ax.set_xlabel('Throughput (tarefas/s)', fontsize=10, color='#555555')
+
+        arquivo_grafico = self.output_dir / "curva_lote.png"
+        plt.savefig(arquivo_grafico, dpi=300, bbox_inches='tight')
+        plt.close(fig)
+        print(f"\n📈 Curva de lotes salva: {arquivo_grafico}")
+        return pontos
+
+    def executar_benchmark_shards(self, contagens: Optional[List[int]] = None,
+                                  taxas: Optional[List[float]] = None,
+                                  duracao: int = 10, escala_custo: float = 0.02,
+                                  num_servidores: int = 16):
+        """
+        Mede a maior taxa de chegada sustentada (requisições/s) para cada número de shards.
+        Usa servidores numerosos e custos reduzidos para que o gargalo seja o orquestrador.
+        Uma taxa é considerada sustentada quando o throughput fica em pelo menos 90% da taxa
+        oferecida e o tempo médio de espera fica abaixo de 1s.
+        """
+        if contagens is None:
+            contagens = [1, 2, 4]
+        if taxas is None:
+            taxas = [10, 20, 40, 80, 160]
+        config_original = self.carregar_config()
+        resultados = {}
+
+        try:
+            for shards in contagens:
+                resultados[shards] = []
+                for taxa in taxas:
+                    config = json.loads(json.dumps(config_original))
+                    config["servidores"] = [
+                        {"id": i, "capacidade": 4, "status": "ativo", "velocidade": 1.0}
+                        for i in range(1, num_servidores + 1)
+                    ]
+                    for tipo in config["tipos_requisicoes"]:
+                        tipo["tempo_exec"] = tipo["tempo_exec"] * escala_custo
+                    config["config"].update({
+                        "tempo_simulacao": duracao,
+                        "intervalo_chegada_min": 1 / taxa,
+                        "intervalo_chegada_max": 1 / taxa,
+                        "sharding": {**config["config"].get("sharding", {}), "shards": shards},
+                    })
+                    self.salvar_config(config)
+
+                    metricas = self.executar_simulacao(config["config"].get("politica", "round_robin"))
+                    if not metricas:
+                        continue
+                    sustentada = (metricas["throughput"] >= 0.9 * taxa
+                                  and metricas["tempo_medio_espera"] < 1.0)
+                    resultados[shards].append({
+                        "taxa": taxa,
+                        "throughput": metricas["throughput"],
+                        "tempo_medio_espera": metricas["tempo_medio_espera"],
+                        "sustentada": sustentada,
+                    })
+        finally:
+            self.salvar_config(config_original)
+
+        maximas = {
+            shards: max((r["taxa"] for r in pontos if r["sustentada"]), default=0)
+            for shards, pontos in resultados.items()
+        }
+
+        with open(self.output_dir / "benchmark_shards.json", "w", encoding="utf-8") as f:
+            json.dump({"maxima_sustentada": maximas, "pontos": resultados}, f, indent=2, ensure_ascii=False)
+
+        plt = carregar_pyplot()
+        fig, ax = plt.subplots(figsize=(8, 6))
+        ax.plot([str(s) for s in maximas], list(maximas.values()), marker='o',
+                color='#3498db', linewidth=2, zorder=3)
+        self._configurar_ax(ax, 'Taxa Máxima Sustentada x Shards', 'Chegadas / Segundo')
+        ax.set_xlabel('Número de shards (orquestradores)', fontsize=10, color='#555555')
+
+        arquivo_grafico = self.output_dir / "benchmark_shards.png"
+        plt.savefig(arquivo_grafico, dpi=300, bbox_inches='tight')
+        plt.close(fig)
+        print(f"\n📈 Benchmark de shards salvo: {arquivo_grafico}")
+        for shards, taxa in maximas.items():
+            print(f"   - {shards} shard(s): {taxa} requisições/s")
+        return maximas
+
+    def montar_matriz(self, rodadas: List[Dict]) -> np.ndarray:
+        return np.array(
+            [[r.get(m, 0) for m in METRICAS_CHAVE] for r in rodadas], dtype=float
+        ).reshape(-1, len(METRICAS_CHAVE))
+
+    def intervalo_bootstrap(self, matriz: np.ndarray, confianca: float = 0.95,
+                            bloco: int = 256) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        IC percentil da média de cada coluna. Cada reamostragem é representada pelos
+        pesos multinomiais das rodadas, então um bloco inteiro vira um único produto
+        matricial (bloco x rodadas) @ (rodadas x métricas).
+        """
+        n = matriz.shape[0]
+        if n < 2:
+            media = matriz.mean(axis=0)
+            return media, media
+
+        medias = np.empty((self.num_reamostragens, matriz.shape[1]))
+        probabilidades = np.full(n, 1 / n)
+        for inicio in range(0, self.num_reamostragens, bloco):
+            tamanho = min(bloco, self.num_reamostragens - inicio)
+            pesos = self.rng.multinomial(n, probabilidades, size=tamanho)
+            medias[inicio:inicio + tamanho] = pesos @ matriz / n
+
+        alfa = (1 - confianca) / 2
+        inferior, superior = np.quantile(medias, [alfa, 1 - alfa], axis=0)
+        return inferior, superior
+
+    def teste_permutacao(self, a: np.ndarray, b: np.ndarray,
+                         bloco: int = 256) -> Tuple[np.ndarray, np.ndarray]:
+        """Teste de permutação bilateral da diferença de médias, para todas as métricas de uma vez."""
+        na, nb = a.shape[0], b.shape[0]
+        juntos = np.vstack([a, b])
+        soma_total = juntos.sum(axis=0)
+        observada = a.mean(axis=0) - b.mean(axis=0)
+
+        extremos = np.zeros(juntos.shape[1])
+        for inicio in range(0, self.num_reamostragens, bloco):
+            tamanho = min(bloco, self.num_reamostragens - inicio)
+            mascara = (self.rng.random((tamanho, na + nb)).argsort(axis=1) < na).astype(float)
+            soma_a = mascara @ juntos
+            diferencas = soma_a / na - (soma_total - soma_a) / nb
+            extremos += (np.abs(diferencas) >= np.abs(observada) - 1e-12).sum(axis=0)
+
+        return observada, (extremos + 1) / (self.num_reamostragens + 1)
+
+    def comparar_politicas(self):
+        self.testes_pareados = {}
+        politicas = [p for p in self.politicas if p in self.amostras and len(self.amostras[p]) >= 2]
+
+        for pa, pb in itertools.combinations(politicas, 2):
+            diferencas, p_valores = self.teste_permutacao(self.amostras[pa], self.amostras[pb])
+            self.testes_pareados[f"{pa} x {pb}"] = {
+                metrica: {"diferenca": float(d), "p_valor": float(p)}
+                for metrica, d, p in zip(METRICAS_CHAVE, diferencas, p_valores)
+            }
+
+        if self.testes_pareados:
+            arquivo = self.output_dir / "testes_pareados.json"
+            with open(arquivo, "w", encoding="utf-8") as f:
+                json.dump(self.testes_pareados, f, indent=2, ensure_ascii=False)
+            print(f"\n📊 Testes pareados salvos: {arquivo}")
+
+    def _config_celula(self, base: Dict, celula: Dict, duracao: int, escala_tempo: float) -> Dict:
+        config = json.loads(json.dumps(base))
+        config["servidores"] = [
+            {"id": i, "capacidade": celula["capacidade"], "status": "ativo", "velocidade": celula["velocidade"]}
+            for i in range(1, celula["num_servidores"] + 1)
         ]
+        for tipo in config["tipos_requisicoes"]:
+            tipo["tempo_exec"] = tipo["tempo_exec"] * escala_tempo
+
+        intervalo = escala_tempo / celula["taxa"]
+        extra = config["config"]
+        extra.update({
+            "politica": celula["politica"],
+            "tempo_simulacao": duracao,
+            "intervalo_chegada_min": 0.5 * intervalo,
+            "intervalo_chegada_max": 1.5 * intervalo,
+            "aplicar_velocidade": True,
+            "intervalo_ciclo": 0.1 * escala_tempo,
+            "quantum": extra.get("quantum", 0.5) * escala_tempo,
+            # Perfil amostrado do laço do orquestrador, para ver como cada fase escala com os servidores
+            "perfil": {"habilitado": True, "amostragem": 10},
+            # Células comparáveis entre si: frota fixa e sem snapshots de checkpoint no laço
+            "checkpoint": {**extra.get("checkpoint", {}), "habilitado": False},
+            "autoescala": {**extra.get("autoescala", {}), "habilitado": False},
+        })
+        return config
+
+    def _executar_celula(self, celula: Dict, config: Dict, pasta: Path, escala_tempo: float) -> Optional[Dict]:
+        chave = hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+        arquivo_celula = pasta / "celulas" / f"{chave}.json"
+
+        if arquivo_celula.exists():
+            with open(arquivo_celula, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        arquivo_config = pasta / "tmp" / f"{chave}_config.json"
+        arquivo_metricas = pasta / "tmp" / f"{chave}_metricas.json"
+        with open(arquivo_config, "w", encoding="utf-8") as f:
+            json.dump(config, f, ensure_ascii=False)
+
+        processo = subprocess.run(
+            [sys.executable, "main.py", "--auto", "--config", str(arquivo_config), "--metricas", str(arquivo_metricas)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        if processo.returncode != 0:
+            # Célula que falhou não vira resultado (nem parcial, nem em cache): fica de fora da varredura
+            arquivo_config.unlink(missing_ok=True)
+            arquivo_metricas.unlink(missing_ok=True)
+            erro = "\n".join(processo.stderr.strip().splitlines()[-5:])
+            print(f"\n⚠️  Célula {celula} falhou (código {processo.returncode}):\n{erro}")
+            return None
+
+        try:
+            with open(arquivo_metricas, "r", encoding="utf-8") as f:
+                metricas = json.load(f)
+        except FileNotFoundError:
+            return None
+        finally:
+            arquivo_config.unlink(missing_ok=True)
+        arquivo_metricas.unlink(missing_ok=True)
+
+        # Converte de volta para a escala de tempo original
+        resultado = {
+            **celula,
+            "throughput": metricas["throughput"] * escala_tempo,
+            "tempo_medio_resposta": metricas["tempo_medio_resposta"] / escala_tempo,
+            "tempo_resposta_p95": metricas.get("tempo_resposta_p95", 0) / escala_tempo,
+            "tempo_resposta_p99": metricas.get("tempo_resposta_p99", 0) / escala_tempo,
+            "utilizacao_media_cpu": metricas["utilizacao_media_cpu"],
+        }
+        if "perfil" in metricas:
+            resultado["custo_ciclo_us"] = {
+                fase: v["media_us"] for fase, v in metricas["perfil"]["fases"].items() if fase != "espera"
+            }
+        with open(arquivo_celula, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        return resultado
+
+    def executar_varredura(self, taxas: List[float], num_servidores: List[int],
+                           capacidades: List[int], velocidades: Optional[List[float]] = None,
+                           politicas: Optional[List[str]] = None, duracao: int = 10,
+                           escala_tempo: float = 1.0, paralelo: Optional[int] = None) -> List[Dict]:
+        """
+        Executa a grade taxa de chegada x servidores x capacidade x velocidade x política.
+        Cada célula é guardada em resultados/varredura/celulas/<hash da config>.json, então
+        uma varredura interrompida retoma de onde parou. escala_tempo < 1 comprime custos
+        e intervalos para rodar mais rápido; os resultados voltam para a escala original.
+        """
+        pasta = self.output_dir / "varredura"
+        (pasta / "celulas").mkdir(parents=True, exist_ok=True)
+        (pasta / "tmp").mkdir(parents=True, exist_ok=True)
+
+        base = self.carregar_config()
+        celulas = [
+            {"taxa": t, "num_servidores": n, "capacidade": c, "velocidade": v, "politica": p}
+            for t, n, c, v, p in itertools.product(
+                taxas, num_servidores, capacidades, velocidades or [1.0], politicas or self.politicas
+            )
+        ]
+        paralelo = paralelo or max(1, (os.cpu_count() or 2) // 2)
+
+        print(f"\n🔎 Varredura: {len(celulas)} células, {paralelo} em paralelo")
+        resultados = []
+        with ThreadPoolExecutor(max_workers=paralelo) as executor:
+            futuros = [
+                executor.submit(self._executar_celula, celula,
+                                self._config_celula(base, celula, duracao, escala_tempo), pasta, escala_tempo)
+                for celula in celulas
+            ]
+            for i, futuro in enumerate(as_completed(futuros), 1):
+                resultado = futuro.result()
+                if resultado:
+                    resultados.append(resultado)
+                print(f"   {i}/{len(celulas)} células concluídas", end="\r")
+        print()
+
+        with open(pasta / "celulas.json", "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+
+        joelhos = self.calcular_joelhos(resultados)
+        with open(pasta / "joelhos.json", "w", encoding="utf-8") as f:
+            json.dump(joelhos, f, indent=2, ensure_ascii=False)
+        self.plotar_saturacao(resultados, joelhos, pasta / "saturacao.png")
+
+        custo_ciclo = self.custo_ciclo_por_servidores(resultados)
+        with open(pasta / "custo_ciclo.json", "w", encoding="utf-8") as f:
+            json.dump(custo_ciclo, f, indent=2, ensure_ascii=False)
+        return resultados
+
+    @staticmethod
+    def custo_ciclo_por_servidores(resultados: List[Dict]) -> Dict:
+        """
+        Média, por número de servidores, do custo de cada fase do laço do orquestrador
+        (µs por ciclo, sem a pausa entre ciclos). Mostra quais fases crescem com o cluster.
+        """
+        com_perfil = [r for r in resultados if "custo_ciclo_us" in r]
+        if not com_perfil:
+            return {}
+
+        fases = list(com_perfil[0]["custo_ciclo_us"])
+        contagens = sorted({r["num_servidores"] for r in com_perfil})
+        custo = {}
+        for n in contagens:
+            matriz = np.array([[r["custo_ciclo_us"][f] for f in fases] for r in com_perfil if r["num_servidores"] == n])
+            custo[n] = dict(zip(fases, np.round(matriz.mean(axis=0), 1).tolist()))
+
+        print(f"\n{'Servidores':<12}" + "".join(f"{f:>16}" for f in fases))
+        for n, valores in custo.items():
+            print(f"{n:<12}" + "".join(f"{valores[f]:>16.1f}" for f in fases))
+        return custo
+
+    @staticmethod
+    def _rotulo_cluster(r: Dict) -> str:
+        return f"{r['num_servidores']}x cap={r['capacidade']} vel={r['velocidade']}"
+
+    @staticmethod
+    def ponto_joelho(taxas: np.ndarray, latencias: np.ndarray) -> Optional[float]:
+        """Kneedle: ponto da curva normalizada mais distante da diagonal."""
+        if len(taxas) < 3 or np.ptp(latencias) == 0:
+            return None
+        x = (taxas - taxas.min()) / np.ptp(taxas)
+        y = (latencias - latencias.min()) / np.ptp(latencias)
+        return float(taxas[np.argmax(x - y)])
+
+    def calcular_joelhos(self, resultados: List[Dict]) -> Dict:
+        grupos = {}
+        for r in resultados:
+            grupos.setdefault(r["politica"], {}).setdefault(self._rotulo_cluster(r), []).append(r)
+
+        joelhos = {}
+        for politica, clusters in grupos.items():
+            joelhos[politica] = {}
+            for rotulo, pontos in clusters.items():
+                pontos.sort(key=lambda r: r["taxa"])
+                taxas = np.array([r["taxa"] for r in pontos], dtype=float)
+                p99 = np.array([r["tempo_resposta_p99"] for r in pontos], dtype=float)
+                joelhos[politica][rotulo] = self.ponto_joelho(taxas, p99)
+        return joelhos
+
+    def plotar_saturacao(self, resultados: List[Dict], joelhos: Dict, arquivo: Path):
+        politicas = [p for p in self.politicas if p in joelhos] or list(joelhos)
+        if not politicas:
+            return
+
+        plt = carregar_pyplot()
+        fig, eixos = plt.subplots(1, len(politicas), figsize=(6 * len(politicas), 5), squeeze=False)
+        for ax, politica in zip(eixos[0], politicas):
+            clusters = {}
+            for r in resultados:
+                if r["politica"] == politica:
+                    clusters.setdefault(self._rotulo_cluster(r), []).append(r)
+            for rotulo, pontos in sorted(clusters.items()):
+                pontos.sort(key=lambda r: r["taxa"])
+                linha, = ax.plot([r["taxa"] for r in pontos], [r["tempo_resposta_p99"] for r in pontos],
+                                 marker='o', linewidth=1.5, label=rotulo, zorder=3)
+                joelho = joelhos[politica].get(rotulo)
+                if joelho is not None:
+                    ax.axvline(joelho, color=linha.get_color(), linestyle=':', alpha=0.6)
+            self._configurar_ax(ax, f'Saturação - {politica}', 'Latência p99 (s)')
+            ax.set_xlabel('Taxa de chegada (req/s)', fontsize=10, color='#555555')
+            ax.legend(fontsize=7, frameon=False)
+
+        plt.savefig(arquivo, dpi=200, bbox_inches='tight')
+        plt.close(fig)
+        print(f"\n📈 Curvas de saturação salvas: {arquivo}")
+
+    def planejar_capacidade(self, resultados: List[Dict], taxa_alvo: float, p99_alvo: float,
+                            politica: Optional[str] = None) -> List[Dict]:
+        """
+        Configurações da varredura que atendem p99 <= p99_alvo com taxa >= taxa_alvo,
+        ordenadas da menor para a maior capacidade total (servidores x capacidade x velocidade).
+        """
+        viaveis = [
+            r for r in resultados
+            if r["taxa"] >= taxa_alvo and r["tempo_resposta_p99"] <= p99_alvo
+            and (politica is None or r["politica"] == politica)
+        ]
+        viaveis.sort(key=lambda r: (r["num_servidores"] * r["capacidade"] * r["velocidade"], r["tempo_resposta_p99"]))
+
+        if viaveis:
+            melhor = viaveis[0]
+            print(f"\n✅ Para {taxa_alvo} req/s com p99 <= {p99_alvo}s: {self._rotulo_cluster(melhor)} "
+                  f"({melhor['politica']}, p99={melhor['tempo_resposta_p99']:.2f}s)")
+        else:
+            print(f"\n⚠️  Nenhuma configuração da varredura atende {taxa_alvo} req/s com p99 <= {p99_alvo}s")
+        return viaveis
+
+    def calcular_estatisticas(self, rodadas: List[Dict]) -> Dict:
+        matriz = self.montar_matriz(rodadas)
+        n = matriz.shape[0]
+
+        medias = matriz.mean(axis=0)
+        desvios = matriz.std(axis=0, ddof=1) if n > 1 else np.zeros(matriz.shape[1])
+        minimos = matriz.min(axis=0)
+        maximos = matriz.max(axis=0)
+        ic_inf, ic_sup = self.intervalo_bootstrap(matriz)
+
+        estatisticas = {"rodadas": n}
         
-        estatisticas = {}
-        
-        for metrica in metricas_chave:
-            valores = [r.get(metrica, 0) for r in rodadas]
-            
-            estatisticas[f"{metrica}_media"] = float(np.mean(valores))
-            estatisticas[f"{metrica}_std"] = float(np.std(valores))
-            estatisticas[f"{metrica}_min"] = float(np.min(valores))
-            estatisticas[f"{metrica}_max"] = float(np.max(valores))
+        for i, metrica in enumerate(METRICAS_CHAVE):
+            estatisticas[f"{metrica}_media"] = float(medias[i])
+            estatisticas[f"{metrica}_std"] = float(desvios[i])
+            estatisticas[f"{metrica}_min"] = float(minimos[i])
+            estatisticas[f"{metrica}_max"] = float(maximos[i])
+            estatisticas[f"{metrica}_ic95_inf"] = float(ic_inf[i])
+            estatisticas[f"{metrica}_ic95_sup"] = float(ic_sup[i])
+
+        tipos = sorted({t for r in rodadas for t in r.get("latencia_por_tipo", {})})
+        estatisticas["latencia_por_tipo"] = {}
+        for tipo in tipos:
+            amostras = [r["latencia_por_tipo"][tipo] for r in rodadas if tipo in r.get("latencia_por_tipo", {})]
+            estatisticas["latencia_por_tipo"][tipo] = {
+                f"{p}_media": float(np.mean([a[p] for a in amostras]))
+                for p in ("media", "p95", "p99")
+            }
+
+        ciclos = [r["ciclo_vida"] for r in rodadas if r.get("ciclo_vida")]
+        if ciclos:
+            estatisticas["ciclo_vida"] = {
+                fase: float(np.mean([c[fase] for c in ciclos])) for fase in ciclos[0]
+            }
         
         return estatisticas
     
@@ -108,6 +860,7 @@ class ComparadorPoliticas:
             print("⚠️  Nenhum resultado disponível para gerar gráficos")
             return
         
+        plt = carregar_pyplot()
         plt.style.use('seaborn-v0_8-whitegrid')
         fig = plt.figure(figsize=(18, 12))
         fig.suptitle('Análise de Performance: Políticas de Escalonamento', fontsize=16, fontweight='bold', y=0.95)
@@ -130,7 +883,8 @@ class ComparadorPoliticas:
         medias = [self.resultados[p]["tempo_medio_resposta_media"] for p in politicas]
         colors = [self.cores.get(p, '#95a5a6') for p in politicas]
         
-        bars = ax.bar(politicas, medias, color=colors, alpha=0.9, width=0.6, zorder=3)
+        bars = ax.bar(politicas, medias, color=colors, alpha=0.9, width=0.6, zorder=3,
+                      yerr=self._erro_ic(politicas, "tempo_medio_resposta"), capsize=4)
         self._configurar_ax(ax, 'Tempo Médio de Resposta', 'Segundos (s)')
         
         for bar in bars:
@@ -145,7 +899,8 @@ class ComparadorPoliticas:
         medias = [self.resultados[p]["throughput_media"] for p in politicas]
         colors = [self.cores.get(p, '#95a5a6') for p in politicas]
         
-        bars = ax.bar(politicas, medias, color=colors, alpha=0.9, width=0.6, zorder=3)
+        bars = ax.bar(politicas, medias, color=colors, alpha=0.9, width=0.6, zorder=3,
+                      yerr=self._erro_ic(politicas, "throughput"), capsize=4)
         self._configurar_ax(ax, 'Throughput (Vazão)', 'Tarefas / Segundo')
         
         for bar in bars:
@@ -218,7 +973,7 @@ class ComparadorPoliticas:
         politicas = list(self.resultados.keys())
         
         x = np.arange(len(metricas_nomes))
-        width = 0.25
+        width = 0.8 / max(1, len(politicas))
         
         for i, politica in enumerate(politicas):
             throughput_norm = self.resultados[politica]["throughput_media"]
@@ -226,7 +981,7 @@ class ComparadorPoliticas:
             tarefas_norm = self.resultados[politica]["tarefas_processadas_media"] / 25 
             
             valores = [throughput_norm, cpu_norm, tarefas_norm]
-            offset = width * (i - 1)
+            offset = width * (i - (len(politicas) - 1) / 2)
             
             ax.bar(x + offset, valores, width, label=politica.replace('_', ' ').title(),
                    color=self.cores.get(politica), alpha=0.85, zorder=3)
@@ -251,8 +1006,9 @@ class ComparadorPoliticas:
             stats = self.resultados[politica]
             
             relatorio.append(f"### {politica.upper().replace('_', ' ')}\n")
-            relatorio.append("| Métrica | Média | Desvio Padrão |\n")
-            relatorio.append("|---------|-------|---------------|\n")
+            relatorio.append(f"Rodadas: {stats.get('rodadas', 1)}\n\n")
+            relatorio.append("| Métrica | Média | Desvio Padrão | IC 95% |\n")
+            relatorio.append("|---------|-------|---------------|--------|\n")
             
             metricas = [
                 ("Tarefas Processadas", "tarefas_processadas", ""),
@@ -266,10 +1022,18 @@ class ComparadorPoliticas:
             for nome, chave, unidade in metricas:
                 media = stats[f"{chave}_media"]
                 std = stats[f"{chave}_std"]
-                relatorio.append(f"| {nome} | {media:.2f}{unidade} | {std:.2f}{unidade} |\n")
+                if stats.get("rodadas", 1) > 1:
+                    ic = f"[{stats[f'{chave}_ic95_inf']:.2f}, {stats[f'{chave}_ic95_sup']:.2f}]{unidade}"
+                else:
+                    ic = "-"
+                relatorio.append(f"| {nome} | {media:.2f}{unidade} | {std:.2f}{unidade} | {ic} |\n")
             
             relatorio.append("\n")
         
+        relatorio.append(self._secao_latencia_cauda())
+        relatorio.append(self._secao_ciclo_vida())
+        relatorio.append(self._secao_testes_pareados())
+
         relatorio.append("## Análise Comparativa\n\n")
         
         if self.resultados:
@@ -291,6 +1055,8 @@ class ComparadorPoliticas:
         relatorio.append("- **Round Robin:** Ideal para ambientes com requisições homogêneas e fairness prioritária\n")
         relatorio.append("- **SJF:** Recomendado quando tempo de resposta é crítico e custos são previsíveis\n")
         relatorio.append("- **Prioridade:** Adequado para sistemas com SLA diferenciados por tipo de cliente\n")
+        relatorio.append("- **Round Robin com Quantum:** Evita que requisições longas monopolizem um servidor, ao custo de mais trocas de contexto\n")
+        relatorio.append("- **SRTF:** Menor latência de cauda para requisições curtas em cargas mistas; requisições longas podem esperar mais\n")
         
         arquivo_relatorio = self.output_dir / "relatorio_comparativo.md"
         with open(arquivo_relatorio, "w", encoding="utf-8") as f:
@@ -298,8 +1064,85 @@ class ComparadorPoliticas:
         
         print(f"\n📄 Relatório gerado: {arquivo_relatorio}")
     
+    def _secao_testes_pareados(self) -> str:
+        if not self.testes_pareados:
+            return ("## Testes de Significância\n\n"
+                    "Execute ao menos 2 rodadas por política para obter intervalos de confiança "
+                    "e testes pareados.\n\n")
+
+        linhas = ["## Testes de Significância (permutação, α = 0,05)\n\n"]
+        linhas.append("| Par | Δ Resposta (s) | p | Δ Throughput | p |\n")
+        linhas.append("|-----|----------------|---|--------------|---|\n")
+        for par, teste in self.testes_pareados.items():
+            resp = teste["tempo_medio_resposta"]
+            thr = teste["throughput"]
+            marca_resp = " *" if resp["p_valor"] < 0.05 else ""
+            marca_thr = " *" if thr["p_valor"] < 0.05 else ""
+            linhas.append(
+                f"| {par} | {resp['diferenca']:+.2f} | {resp['p_valor']:.3f}{marca_resp} "
+                f"| {thr['diferenca']:+.2f} | {thr['p_valor']:.3f}{marca_thr} |\n"
+            )
+        linhas.append("\n\\* diferença significativa\n\n")
+        return "".join(linhas)
+
+    def _erro_ic(self, politicas: List[str], chave: str) -> np.ndarray:
+        medias = np.array([self.resultados[p][f"{chave}_media"] for p in politicas])
+        inf = np.array([self.resultados[p].get(f"{chave}_ic95_inf", m) for p, m in zip(politicas, medias)])
+        sup = np.array([self.resultados[p].get(f"{chave}_ic95_sup", m) for p, m in zip(politicas, medias)])
+        return np.vstack([medias - inf, sup - medias])
+
+    def _secao_ciclo_vida(self) -> str:
+        politicas = [p for p in self.politicas if self.resultados.get(p, {}).get("ciclo_vida")]
+        if not politicas:
+            return ""
+
+        fases = [f for f, _, _ in FASES_CICLO_VIDA]
+        linhas = ["## Decomposição da Latência (média por fase, s)\n\n"]
+        linhas.append("| Política | " + " | ".join(fases) + " |\n")
+        linhas.append("|---------|" + "|".join("-------" for _ in fases) + "|\n")
+        for politica in politicas:
+            ciclo = self.resultados[politica]["ciclo_vida"]
+            linhas.append(f"| {politica} | " + " | ".join(f"{ciclo.get(f, 0):.3f}" for f in fases) + " |\n")
+        linhas.append("\n")
+        return "".join(linhas)
+
+    def _secao_latencia_cauda(self) -> str:
+        politicas = [p for p in self.politicas if p in self.resultados]
+        tipos = sorted({t for p in politicas for t in self.resultados[p].get("latencia_por_tipo", {})})
+        if not tipos:
+            return ""
+
+        linhas = ["## Latência de Cauda por Tipo (p95)\n\n"]
+        linhas.append("| Política | " + " | ".join(tipos) + " |\n")
+        linhas.append("|---------|" + "|".join("-------" for _ in tipos) + "|\n")
+        for politica in politicas:
+            lat = self.resultados[politica].get("latencia_por_tipo", {})
+            celulas = [f"{lat[t]['p95_media']:.2f}s" if t in lat else "-" for t in tipos]
+            linhas.append(f"| {politica} | " + " | ".join(celulas) + " |\n")
+        linhas.append("\n")
+
+        config = self.carregar_config()
+        custos = {t["tipo"]: t["tempo_exec"] for t in config.get("tipos_requisicoes", [])}
+        tipo_curto = min((t for t in tipos if t in custos), key=lambda t: custos[t], default=None)
+        base = self.resultados.get("round_robin", {}).get("latencia_por_tipo", {}).get(tipo_curto)
+
+        if tipo_curto and base and base["p95_media"] > 0:
+            linhas.append(f"Melhoria do p95 das requisições curtas ({tipo_curto}) em relação ao Round Robin:\n\n")
+            for politica in politicas:
+                lat = self.resultados[politica].get("latencia_por_tipo", {}).get(tipo_curto)
+                if politica == "round_robin" or not lat:
+                    continue
+                ganho = (1 - lat["p95_media"] / base["p95_media"]) * 100
+                linhas.append(f"- **{politica}:** {ganho:+.1f}%\n")
+            linhas.append("\n")
+
+        return "".join(linhas)
+
     def executar_analise_completa(self, num_rodadas: int = 3):
-        self.executar_multiplas_rodadas(num_rodadas)
+        try:
+            self.executar_multiplas_rodadas(num_rodadas)
+        finally:
+            self.encerrar_pool()
         self.gerar_graficos()
         self.gerar_relatorio_markdown()
         self.exibir_resumo()
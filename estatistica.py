@@ -0,0 +1,10 @@
+from typing import List
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil p (0-100) pelo método do posto mais próximo; 0.0 sem valores."""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    idx = max(0, min(len(ordenados) - 1, int(round(p / 100 * len(ordenados) + 0.5)) - 1))
+    return ordenados[idx]
@@ -0,0 +1,212 @@
+import json
+import sys
+import time
+from typing import Dict, Optional
+
+FASES_ORQUESTRADOR = (
+    "entrada", "resultados", "heartbeats", "saude", "despacho",
+    "preempcao", "rebalanceamento", "migracao", "autoescala", "checkpoint", "espera",
+)
+
+# Fases do ciclo de vida de uma requisição: (nome, coluna de início, coluna de fim)
+FASES_CICLO_VIDA = (
+    ("transito_entrada", "criacao", "chegada"),
+    ("fila_pronta", "chegada", "despacho"),
+    ("fila_servidor", "despacho", "retirada"),
+    ("aguardando_execucao", "retirada", "inicio"),
+    ("execucao", "inicio", "fim"),
+    ("retorno", "fim", "recebido"),
+)
+
+
+class SaidaCronometrada:
+    """
+    Envolve o sys.stdout do orquestrador e acumula o tempo gasto em write() nos
+    ciclos medidos. A impressão acontece dentro das fases, então esse tempo já está
+    incluído nelas; ele aparece separado no relatório só para mostrar quanto pesa.
+    """
+    def __init__(self, saida, perfil: "PerfilOrquestrador"):
+        self.saida = saida
+        self.perfil = perfil
+
+    def write(self, texto: str) -> int:
+        if not self.perfil.ciclo_medido:
+            return self.saida.write(texto)
+        inicio = time.perf_counter_ns()
+        escrito = self.saida.write(texto)
+        self.perfil.impressao_ns += time.perf_counter_ns() - inicio
+        return escrito
+
+    def __getattr__(self, nome):
+        return getattr(self.saida, nome)
+
+
+class PerfilOrquestrador:
+    """
+    Instrumentação opcional do laço do orquestrador. Cada ciclo é dividido em fases
+    consecutivas: marcar(fase) atribui à fase o tempo desde a marca anterior, medido
+    com perf_counter_ns. Com amostragem = N, só um a cada N ciclos é cronometrado
+    (os contadores são sempre atualizados), o que mantém o custo baixo. Desabilitado,
+    todos os métodos retornam de imediato.
+
+    Se arquivo_cprofile for informado, o laço também roda sob cProfile e as
+    estatísticas são gravadas nesse arquivo (formato pstats, aceito por
+    snakeviz, flameprof e gprof2dot para gerar flamegraphs).
+    """
+    def __init__(self, habilitado: bool = False, amostragem: int = 1, arquivo_cprofile: Optional[str] = None):
+        self.habilitado = habilitado
+        self.amostragem = max(1, amostragem)
+        self.arquivo_cprofile = arquivo_cprofile
+        self.ciclos = 0
+        self.ciclos_medidos = 0
+        self.ciclo_medido = False
+        self.total_ns = {f: 0 for f in FASES_ORQUESTRADOR}
+        self.max_ns = {f: 0 for f in FASES_ORQUESTRADOR}
+        self.impressao_ns = 0
+        self.contadores: Dict[str, int] = {}
+        self.maximos: Dict[str, int] = {}
+        self._no_ciclo: Dict[str, int] = {}
+        self._marca = 0
+        self._perfilador = None
+        self._saida_original = None
+
+    def iniciar(self):
+        if not self.habilitado:
+            return
+        self._saida_original = sys.stdout
+        sys.stdout = SaidaCronometrada(sys.stdout, self)
+        if self.arquivo_cprofile:
+            import cProfile
+            self._perfilador = cProfile.Profile()
+            self._perfilador.enable()
+
+    def finalizar(self):
+        if self._perfilador is not None:
+            self._perfilador.disable()
+            self._perfilador.dump_stats(self.arquivo_cprofile)
+            self._perfilador = None
+        if self._saida_original is not None:
+            sys.stdout = self._saida_original
+            self._saida_original = None
+
+    def iniciar_ciclo(self):
+        if not self.habilitado:
+            return
+        self._fechar_contadores()
+        self.ciclos += 1
+        self.ciclo_medido = self.ciclos % self.amostragem == 0
+        if self.ciclo_medido:
+            self.ciclos_medidos += 1
+            self._marca = time.perf_counter_ns()
+
+    def marcar(self, fase: str):
+        if not self.ciclo_medido:
+            return
+        agora = time.perf_counter_ns()
+        duracao = agora - self._marca
+        self.total_ns[fase] += duracao
+        if duracao > self.max_ns[fase]:
+            self.max_ns[fase] = duracao
+        self._marca = agora
+
+    def contar(self, nome: str, quantidade: int = 1):
+        if self.habilitado:
+            self._no_ciclo[nome] = self._no_ciclo.get(nome, 0) + quantidade
+
+    def _fechar_contadores(self):
+        for nome, quantidade in self._no_ciclo.items():
+            self.contadores[nome] = self.contadores.get(nome, 0) + quantidade
+            if quantidade > self.maximos.get(nome, 0):
+                self.maximos[nome] = quantidade
+        self._no_ciclo = {}
+
+    def resumo(self) -> Dict:
+        self._fechar_contadores()
+        total_laco = sum(self.total_ns.values()) or 1
+        medidos = self.ciclos_medidos or 1
+        return {
+            "amostragem": self.amostragem,
+            "ciclos": self.ciclos,
+            "ciclos_medidos": self.ciclos_medidos,
+            "fases": {
+                f: {
+                    "total_ms": round(self.total_ns[f] / 1e6, 3),
+                    "percentual": round(self.total_ns[f] / total_laco * 100, 1),
+                    "media_us": round(self.total_ns[f] / medidos / 1e3, 1),
+                    "max_us": round(self.max_ns[f] / 1e3, 1),
+                }
+                for f in FASES_ORQUESTRADOR
+            },
+            "impressao_ms": round(self.impressao_ns / 1e6, 3),
+            "contadores": {
+                c: {
+                    "total": v,
+                    "media_por_ciclo": round(v / (self.ciclos or 1), 2),
+                    "max_por_ciclo": self.maximos.get(c, 0),
+                }
+                for c, v in sorted(self.contadores.items())
+            },
+        }
+
+    def imprimir(self):
+        r = self.resumo()
+        print()
+        print(f"Perfil do laço do orquestrador ({r['ciclos_medidos']} de {r['ciclos']} ciclos medidos):")
+        print(f"  {'Fase':<16} {'Total (ms)':>11} {'%':>6} {'Média (µs)':>11} {'Máx (µs)':>10}")
+        for fase, v in r["fases"].items():
+            print(f"  {fase:<16} {v['total_ms']:>11.2f} {v['percentual']:>6.1f} {v['media_us']:>11.1f} {v['max_us']:>10.1f}")
+        print(f"  {'(impressão)':<16} {r['impressao_ms']:>11.2f}   (incluída nas fases acima)")
+        if r["contadores"]:
+            print(f"  {'Contador':<16} {'Total':>11} {'Média/ciclo':>13} {'Máx/ciclo':>10}")
+            for nome, v in r["contadores"].items():
+                print(f"  {nome:<16} {v['total']:>11} {v['media_por_ciclo']:>13.2f} {v['max_por_ciclo']:>10}")
+        if self.arquivo_cprofile:
+            print(f"  Perfil cProfile salvo em {self.arquivo_cprofile}")
+
+
+def exportar_trace_chrome(execucao: int, arquivo: str, pasta: Optional[str] = None) -> int:
+    """
+    Converte os registros de tarefas de uma execução do armazém colunar em um trace
+    JSON no formato do Chrome (chrome://tracing ou ui.perfetto.dev). Cada servidor
+    vira um processo do trace, e as requisições atendidas pelo cache ficam em "Cache".
+    Cada requisição é um evento assíncrono com as fases de FASES_CICLO_VIDA aninhadas.
+    Retorna o número de requisições exportadas.
+    """
+    from armazenamento import PASTA_ARMAZEM, ler_tabela
+
+    tarefas, nomes = ler_tabela("tarefas", pasta or PASTA_ARMAZEM, execucao)
+    if not tarefas or not len(tarefas["id"]):
+        return 0
+
+    colunas = {c: v.tolist() for c, v in tarefas.items()}
+    tipos = nomes.get("tipo", [])
+    eventos = []
+
+    for sid in sorted(set(colunas["servidor"])):
+        eventos.append({
+            "name": "process_name", "ph": "M", "pid": sid, "tid": 0,
+            "args": {"name": "Cache" if sid < 0 else f"Servidor {sid}"},
+        })
+
+    for i, task_id in enumerate(colunas["id"]):
+        sid = colunas["servidor"][i]
+        base = {"cat": "requisicao", "id": task_id, "pid": sid, "tid": 0}
+
+        def instante(coluna: str) -> float:
+            return colunas[coluna][i] * 1e6
+
+        tipo = tipos[colunas["tipo"][i]] if tipos else colunas["tipo"][i]
+        nome = f"Requisição {task_id} ({tipo})"
+        eventos.append({
+            **base, "ph": "b", "name": nome, "ts": instante("criacao"),
+            "args": {"prioridade": colunas["prioridade"][i]},
+        })
+        for fase, coluna_inicio, coluna_fim in FASES_CICLO_VIDA:
+            if instante(coluna_fim) > instante(coluna_inicio):
+                eventos.append({**base, "ph": "b", "name": fase, "ts": instante(coluna_inicio)})
+                eventos.append({**base, "ph": "e", "name": fase, "ts": instante(coluna_fim)})
+        eventos.append({**base, "ph": "e", "name": nome, "ts": instante("recebido")})
+
+    with open(arquivo, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": eventos, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+    return len(colunas["id"])
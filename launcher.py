@@ -1,8 +1,6 @@
 import os
 import sys
-import subprocess
 import time
-from comparador import ComparadorPoliticas
 
 class MenuTerminal:
     def __init__(self):
@@ -105,7 +103,8 @@ def main():
             
         elif escolha == 0:
             try:
-                subprocess.run(["python", "main.py"])
+                import main as simulacao
+                simulacao.main([])
                 pausar_retorno()
             except KeyboardInterrupt:
                 pass
@@ -120,6 +119,7 @@ def main():
                 print(f"\nIniciando análise com {rodadas} rodadas...")
                 time.sleep(1)
                 
+                from comparador import ComparadorPoliticas
                 comp = ComparadorPoliticas()
                 comp.executar_analise_completa(num_rodadas=rodadas)
                 
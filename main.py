@@ -4,9 +4,20 @@ import random
 import queue
 import json
 import os
+import bisect
+import hashlib
+import heapq
 import sys
-from dataclasses import dataclass
-from typing import List, Dict, Tuple
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import List, Dict, Set, Tuple, Optional
+
+from armazenamento import PASTA_ARMAZEM, COLUNAS_TAREFAS, EscritorColunar, registrar_execucao
+from autoescala import ControladorAutoescala
+from checkpoint import (PASTA_CHECKPOINT, GerenciadorCheckpoint, carregar_checkpoint, localizar_checkpoint,
+                        pasta_execucao)
+from estatistica import percentil
+from instrumentacao import PerfilOrquestrador, exportar_trace_chrome
 
 
 
@@ -82,6 +93,20 @@ def prioridade_str(p: int) -> str:
     return {1: "Alta", 2: "Média", 3: "Baixa"}.get(p, f"{p}")
 
 
+POLITICAS_PREEMPTIVAS = ("round_robin_quantum", "srtf")
+
+
+def resumo_latencias(amostras: List[float]) -> Dict:
+    """Resumo usado nos blocos latencia_por_tipo e latencia_por_cliente (com ou sem shards)."""
+    return {
+        "tarefas": len(amostras),
+        "media": round(sum(amostras) / len(amostras), 2) if amostras else 0.0,
+        "p50": round(percentil(amostras, 50), 2),
+        "p95": round(percentil(amostras, 95), 2),
+        "p99": round(percentil(amostras, 99), 2),
+    }
+
+
 @dataclass
 class Servidor:
     id: int
@@ -90,12 +115,22 @@ class Servidor:
     velocidade: float
 
 
+@dataclass
+class PoolAfinidade:
+    nome: str
+    servidores: Tuple[int, ...]
+    tipos: Tuple[str, ...]
+    peso: float = 1.0
+
+
 @dataclass
 class TipoRequisicao:
     id: int
     tipo: str
     peso: int
     tempo_exec: int
+    tamanho_resultado: int = 4096
+    expoente_lote: float = 1.0
 
 
 @dataclass
@@ -106,6 +141,21 @@ class Task:
     criacao: float
     tipo: str = "generico"
     prioridade: int = 2
+    servidores_excluidos: Tuple[int, ...] = ()
+    chave: str = ""
+    cliente: str = "padrao"
+    executado: float = 0.0
+    tempo_cpu: float = 0.0
+    doada: bool = False
+    # Instantes do ciclo de vida (time.time()); 0.0 enquanto não ocorreram.
+    # Guardam a primeira ocorrência: reenvios e retomadas não os sobrescrevem.
+    despacho: float = 0.0
+    retirada: float = 0.0
+    inicio_execucao: float = 0.0
+
+    @property
+    def restante(self) -> float:
+        return max(0.0, self.custo_estimado - self.executado)
 
 
 @dataclass
@@ -114,6 +164,252 @@ class Result:
     worker_id: int
     tempo_espera: float
     tempo_execucao: float
+    tamanho_lote: int = 1
+    abre_lote: bool = True  # primeiro resultado do lote; cada lote é contado uma vez
+    tipo: str = ""
+    tempo_servidor: float = -1.0
+    despacho: float = 0.0
+    retirada: float = 0.0
+    inicio: float = 0.0
+    fim: float = 0.0
+    cliente: str = ""
+
+
+@dataclass
+class Suspensao:
+    task: Task
+    worker_id: int
+    tempo_servidor: float
+
+
+@dataclass
+class Reconfiguracao:
+    worker_id: int
+    inicio_global: float
+    intervalo_heartbeat: float
+    falha_simulada: Optional[Dict]
+    config_lote: Optional[Dict]
+    velocidade: float
+    preemptivo: bool
+    quantum: float
+    modo: str
+
+
+@dataclass
+class FimRodada:
+    worker_id: int
+
+
+@dataclass
+class Heartbeat:
+    worker_id: int
+    instante: float
+    task_id: Optional[int] = None
+    inicio_tarefa: float = 0.0
+    duracao_prevista: float = 0.0
+
+
+class CacheResultados:
+    """
+    Cache de resultados de inferência indexado pela chave de conteúdo da Task,
+    limitado em bytes, com expiração por TTL e política de evicção configurável
+    ("lru", "lfu" ou "fifo").
+
+    Como o TTL é o mesmo para todas as entradas, elas expiram na ordem de inserção:
+    a fila ordem_insercao (mantida só com TTL) permite descartar as vencidas antes
+    de qualquer evicção sem percorrer o cache. No LFU, a vítima sai de um heap (acessos, sequência,
+    chave); entradas do heap que ficaram desatualizadas são ignoradas ao sair.
+    """
+    def __init__(self, capacidade_bytes: int, ttl: float, politica: str = "lru"):
+        self.capacidade_bytes = capacidade_bytes
+        self.ttl = ttl
+        self.politica = politica.lower()
+        self.entradas: OrderedDict = OrderedDict()  # chave -> [tamanho, inserido_em, acessos, sequencia]
+        self.ordem_insercao: deque = deque()  # (sequencia, chave)
+        self.heap_lfu: List[Tuple[int, int, str]] = []
+        self.sequencia = 0
+        self.bytes_usados = 0
+        self.bytes_pico = 0
+        self.evicoes = 0
+        self.expiradas = 0
+
+    def _remover(self, chave: str):
+        tamanho, _, _, _ = self.entradas.pop(chave)
+        self.bytes_usados -= tamanho
+
+    def _vigente(self, chave: str, sequencia: int) -> bool:
+        entrada = self.entradas.get(chave)
+        return entrada is not None and entrada[3] == sequencia
+
+    def _expirar(self):
+        if not self.ttl:
+            return
+        limite = time.time() - self.ttl
+        while self.ordem_insercao:
+            sequencia, chave = self.ordem_insercao[0]
+            if not self._vigente(chave, sequencia):
+                self.ordem_insercao.popleft()
+            elif self.entradas[chave][1] < limite:
+                self.ordem_insercao.popleft()
+                self._remover(chave)
+                self.expiradas += 1
+            else:
+                break
+
+    def _registrar_acesso_lfu(self, chave: str):
+        _, _, acessos, sequencia = self.entradas[chave]
+        heapq.heappush(self.heap_lfu, (acessos, sequencia, chave))
+        if len(self.heap_lfu) > 2 * len(self.entradas) + 16:
+            # Descarta as entradas desatualizadas para o heap não crescer sem limite
+            self.heap_lfu = [(e[2], e[3], c) for c, e in self.entradas.items()]
+            heapq.heapify(self.heap_lfu)
+
+    def _vitima_lfu(self) -> str:
+        while True:
+            acessos, sequencia, chave = heapq.heappop(self.heap_lfu)
+            if self._vigente(chave, sequencia) and self.entradas[chave][2] == acessos:
+                return chave
+
+    def obter(self, chave: str) -> bool:
+        """Retorna True se a chave está em cache e ainda é válida."""
+        entrada = self.entradas.get(chave)
+        if entrada is None:
+            return False
+
+        if self.ttl and time.time() - entrada[1] > self.ttl:
+            self._remover(chave)
+            self.expiradas += 1
+            return False
+
+        entrada[2] += 1
+        if self.politica == "lru":
+            self.entradas.move_to_end(chave)
+        elif self.politica == "lfu":
+            self._registrar_acesso_lfu(chave)
+        return True
+
+    def inserir(self, chave: str, tamanho: int):
+        if tamanho > self.capacidade_bytes:
+            return
+        if chave in self.entradas:
+            self._remover(chave)
+
+        # Entradas vencidas saem antes de qualquer vítima válida
+        self._expirar()
+        while self.bytes_usados + tamanho > self.capacidade_bytes:
+            if self.politica == "lfu":
+                vitima = self._vitima_lfu()
+            else:
+                vitima = next(iter(self.entradas))
+            self._remover(vitima)
+            self.evicoes += 1
+
+        self.sequencia += 1
+        self.entradas[chave] = [tamanho, time.time(), 0, self.sequencia]
+        if self.ttl:
+            self.ordem_insercao.append((self.sequencia, chave))
+            if len(self.ordem_insercao) > 2 * len(self.entradas) + 16:
+                # Descarta as posições de entradas já removidas (evicção ou reinserção)
+                self.ordem_insercao = deque(
+                    (seq, c) for seq, c in self.ordem_insercao if self._vigente(c, seq)
+                )
+        if self.politica == "lfu":
+            self._registrar_acesso_lfu(chave)
+        self.bytes_usados += tamanho
+        self.bytes_pico = max(self.bytes_pico, self.bytes_usados)
+
+
+class FilaJustaClientes:
+    """
+    Fila justa entre clientes por deficit round robin (DRR). Cada cliente tem a sua
+    fila FIFO, e os clientes com requisições pendentes ficam em uma lista circular.
+    Ao chegar a sua vez, o cliente recebe quantum × peso de crédito e envia
+    requisições enquanto o crédito cobrir o custo restante da próxima; o que sobra
+    fica para a próxima volta (e é zerado quando a fila do cliente esvazia).
+
+    Com quantum >= maior custo / menor peso, toda vez na lista envia ao menos uma
+    requisição, então escolher a próxima custa O(1) amortizado, qualquer que seja
+    o número de clientes.
+
+    A fila_pronta continua sendo a fila do orquestrador; cada ponto que a altera
+    também avisa a fila justa (adicionar ao entrar, remover quando a requisição sai
+    por outro caminho que não o despacho, como o repasse entre shards). A remoção é
+    preguiçosa: a cópia na fila do cliente é descartada quando chega à frente.
+    """
+    def __init__(self, pesos: Dict[str, float], quantum: float):
+        self.pesos = pesos
+        self.quantum = quantum
+        self.filas: Dict[str, deque] = {}
+        self.deficit: Dict[str, float] = {}
+        self.ativos: deque = deque()
+        self.em_ativos = set()
+        self.enfileiradas: Dict[int, Task] = {}  # id -> requisição vigente na fila do cliente
+        self.na_vez = False  # o cliente na frente de ativos já recebeu o crédito desta volta
+
+    def adicionar(self, tarefa: Task, na_frente: bool = False):
+        fila = self.filas.setdefault(tarefa.cliente, deque())
+        if na_frente:
+            fila.appendleft(tarefa)
+        else:
+            fila.append(tarefa)
+        self.enfileiradas[tarefa.id] = tarefa
+        if tarefa.cliente not in self.em_ativos:
+            self.em_ativos.add(tarefa.cliente)
+            self.ativos.append(tarefa.cliente)
+
+    def remover(self, ids):
+        for tid in ids:
+            self.enfileiradas.pop(tid, None)
+
+    def _sair(self, cliente: str):
+        self.ativos.popleft()
+        self.em_ativos.discard(cliente)
+        self.deficit[cliente] = 0.0
+        self.na_vez = False
+
+    def proxima(self) -> Optional[Task]:
+        while self.ativos:
+            cliente = self.ativos[0]
+            fila = self.filas[cliente]
+            if not fila:
+                self._sair(cliente)
+                continue
+            if self.enfileiradas.get(fila[0].id) is not fila[0]:
+                fila.popleft()
+                continue
+            if not self.na_vez:
+                self.deficit[cliente] = self.deficit.get(cliente, 0.0) + self.quantum * self.pesos.get(cliente, 1.0)
+                self.na_vez = True
+            if fila[0].restante <= self.deficit[cliente]:
+                tarefa = fila.popleft()
+                self.deficit[cliente] -= tarefa.restante
+                del self.enfileiradas[tarefa.id]
+                if not fila:
+                    self._sair(cliente)
+                return tarefa
+            self.ativos.rotate(-1)
+            self.na_vez = False
+        return None
+
+    def devolver(self, tarefa: Task):
+        """Desfaz o último proxima() quando a tarefa não encontrou servidor livre."""
+        cliente = tarefa.cliente
+        self.filas[cliente].appendleft(tarefa)
+        self.enfileiradas[tarefa.id] = tarefa
+        self.deficit[cliente] = self.deficit.get(cliente, 0.0) + tarefa.restante
+        if cliente not in self.em_ativos:
+            self.em_ativos.add(cliente)
+            self.ativos.appendleft(cliente)
+            self.na_vez = True
+
+
+def gerar_pesos_zipf(num_chaves: int, s: float) -> List[float]:
+    acumulado = 0.0
+    pesos = []
+    for k in range(1, num_chaves + 1):
+        acumulado += 1.0 / (k ** s)
+        pesos.append(acumulado)
+    return pesos
 
 
 def carregar_config(caminho_arquivo: str) -> Tuple[List[Servidor], List[TipoRequisicao], Dict]:
@@ -136,6 +432,8 @@ def carregar_config(caminho_arquivo: str) -> Tuple[List[Servidor], List[TipoRequ
             tipo=r["tipo"],
             peso=r["peso"],
             tempo_exec=r["tempo_exec"],
+            tamanho_resultado=r.get("tamanho_resultado", 4096),
+            expoente_lote=r.get("expoente_lote", 1.0),
         )
         for r in dados["tipos_requisicoes"]
     ]
@@ -150,16 +448,41 @@ def gerador_requisicoes(tipos_requisicoes: List[TipoRequisicao],
                         fila_entrada: multiprocessing.Queue,
                         tempo_simulacao: int, 
                         inicio_global: float,
-                        num_workers: int):
+                        num_workers: int,
+                        proximo_id: int = 1,
+                        decorrido: float = 0.0):
     intervalo_min = config_extra.get("intervalo_chegada_min", 0.5)
     intervalo_max = config_extra.get("intervalo_chegada_max", 2.0)
 
-    inicio_local = time.time()
-    task_id = 1
+    cfg_cache = config_extra.get("cache", {})
+    if cfg_cache.get("habilitado"):
+        chaves = list(range(cfg_cache.get("num_chaves", 50)))
+        pesos_zipf = gerar_pesos_zipf(len(chaves), cfg_cache.get("zipf_s", 1.1))
+    else:
+        pesos_zipf = None
+
+    cfg_clientes = config_extra.get("clientes", {})
+    taxas = {}
+    if cfg_clientes.get("habilitado"):
+        taxas = {c["nome"]: c.get("taxa", 1.0) for c in cfg_clientes.get("lista", [])}
+    taxas = taxas or {"padrao": 1.0}
+    sufixo_cliente = ", Cliente: {}" if cfg_clientes.get("habilitado") else ""
+
+    # Na retomada de um checkpoint, decorrido é o tempo de simulação já cumprido
+    agora = time.time()
+    inicio_local = agora - decorrido
+    task_id = proximo_id
+    # Cada cliente é um fluxo de chegadas independente; a taxa divide os intervalos sorteados
+    proxima_chegada = {cliente: agora for cliente in taxas}
 
     print(f"[{format_tempo_relativo(inicio_global)}] [GER] Processo de geração de requisições iniciado.")
 
-    while (time.time() - inicio_local) < tempo_simulacao:
+    while True:
+        cliente = min(proxima_chegada, key=proxima_chegada.get)
+        if proxima_chegada[cliente] - inicio_local >= tempo_simulacao:
+            break
+        time.sleep(max(0.0, proxima_chegada[cliente] - time.time()))
+
         tipo_escolhido = random.choice(tipos_requisicoes)
         agora = time.time()
 
@@ -170,19 +493,22 @@ def gerador_requisicoes(tipos_requisicoes: List[TipoRequisicao],
             criacao=agora,
             tipo=tipo_escolhido.tipo,
             prioridade=tipo_escolhido.peso,
+            cliente=cliente,
         )
+        if pesos_zipf:
+            task.chave = f"{tipo_escolhido.tipo}:{random.choices(chaves, cum_weights=pesos_zipf)[0]}"
 
         ts = format_tempo_relativo(inicio_global)
         print(
             f"[{ts}] [GER] Requisição {task_id} criada "
             f"(Tipo: {tipo_escolhido.tipo}, Custo: {tipo_escolhido.tempo_exec}s, "
-            f"Prioridade: {prioridade_str(task.prioridade)})"
+            f"Prioridade: {prioridade_str(task.prioridade)}{sufixo_cliente.format(cliente)})"
         )
 
         fila_entrada.put(task)
         task_id += 1
 
-        time.sleep(random.uniform(intervalo_min, intervalo_max))
+        proxima_chegada[cliente] += random.uniform(intervalo_min, intervalo_max) / taxas[cliente]
 
     ts = format_tempo_relativo(inicio_global)
     print(f"[{ts}] [GER] Tempo de simulação esgotado. Enviando {num_workers} poison pills.")
@@ -191,73 +517,609 @@ def gerador_requisicoes(tipos_requisicoes: List[TipoRequisicao],
         fila_entrada.put(None)
 
 
+def enviar_heartbeat(heartbeat_queue: Optional[multiprocessing.Queue],
+                     id_worker: int,
+                     task_id: Optional[int] = None,
+                     inicio_tarefa: float = 0.0,
+                     duracao_prevista: float = 0.0):
+    if heartbeat_queue is not None:
+        heartbeat_queue.put(Heartbeat(id_worker, time.time(), task_id, inicio_tarefa, duracao_prevista))
+
+
+def executar_tarefa(duracao: float,
+                    id_worker: int,
+                    task_id: int,
+                    heartbeat_queue: Optional[multiprocessing.Queue],
+                    intervalo_heartbeat: float,
+                    duracao_prevista: float = 0.0):
+    inicio = time.time()
+    if heartbeat_queue is None:
+        time.sleep(duracao)
+        return
+
+    fim = inicio + duracao
+    enviar_heartbeat(heartbeat_queue, id_worker, task_id, inicio, duracao_prevista)
+    while True:
+        restante = fim - time.time()
+        if restante <= 0:
+            break
+        time.sleep(min(intervalo_heartbeat, restante))
+        enviar_heartbeat(heartbeat_queue, id_worker, task_id, inicio, duracao_prevista)
+
+
+def registrar_retirada(task: Optional[Task]):
+    if task is not None and not task.retirada:
+        task.retirada = time.time()
+
+
+def custo_lote(custo_unitario: float, tamanho: int, expoente: float) -> float:
+    return custo_unitario * (tamanho ** expoente)
+
+
+def montar_lote(primeira: Task,
+                pendentes: List[Task],
+                task_queue: multiprocessing.Queue,
+                tamanho_max: int,
+                espera_max: float) -> Tuple[List[Task], bool]:
+    lote = [primeira]
+
+    for t in list(pendentes):
+        if len(lote) >= tamanho_max:
+            break
+        if t.tipo == primeira.tipo:
+            pendentes.remove(t)
+            lote.append(t)
+
+    limite = time.time() + espera_max
+    encerrar = False
+
+    while len(lote) < tamanho_max:
+        restante = limite - time.time()
+        if restante <= 0:
+            break
+        try:
+            t = task_queue.get(timeout=restante)
+        except queue.Empty:
+            break
+        registrar_retirada(t)
+
+        if t is None:
+            encerrar = True
+            break
+        if t.tipo == primeira.tipo:
+            lote.append(t)
+        else:
+            pendentes.append(t)
+
+    return lote, encerrar
+
+
+def aplicar_falha_simulada(falha_simulada: Optional[Dict],
+                           tarefas_executadas: int,
+                           id_worker: int,
+                           inicio_global: float) -> float:
+    if not falha_simulada or tarefas_executadas < falha_simulada.get("apos_tarefas", 0):
+        return 1.0
+
+    modo = falha_simulada.get("modo", "travar")
+    print(f"[{format_tempo_relativo(inicio_global)}] [SRV-{id_worker}] Falha simulada ({modo}).")
+    if modo == "travar":
+        while True:
+            time.sleep(3600)
+    return falha_simulada.get("fator_lentidao", 10)
+
+
 def worker_process(id_worker: int, 
                    task_queue: multiprocessing.Queue,
                    result_queue: multiprocessing.Queue, 
-                   inicio_global: float):
+                   inicio_global: float,
+                   heartbeat_queue: Optional[multiprocessing.Queue] = None,
+                   intervalo_heartbeat: float = 1.0,
+                   falha_simulada: Optional[Dict] = None,
+                   config_lote: Optional[Dict] = None,
+                   velocidade: float = 1.0):
     print(f"[{format_tempo_relativo(inicio_global)}] [SRV-{id_worker}] Iniciado e aguardando tarefas...")
 
+    tarefas_executadas = 0
+    pendentes = []
+    encerrar = False
+
     while True:
-        try:
-            task = task_queue.get(timeout=5)
-        except queue.Empty:
-            continue
+        if pendentes:
+            task = pendentes.pop(0)
+        elif encerrar:
+            task = None
+        else:
+            try:
+                task = task_queue.get(timeout=intervalo_heartbeat)
+            except queue.Empty:
+                enviar_heartbeat(heartbeat_queue, id_worker)
+                continue
+            registrar_retirada(task)
 
         if task is None:
             print(f"[{format_tempo_relativo(inicio_global)}] [SRV-{id_worker}] Recebida poison pill. Encerrando.")
             break
 
+        lote = [task]
+        expoente = 1.0
+        if config_lote:
+            lote, sinal_fim = montar_lote(
+                task, pendentes, task_queue,
+                config_lote.get("tamanho_max", 4), config_lote.get("espera_max", 0.2)
+            )
+            encerrar = encerrar or sinal_fim
+            expoente = config_lote.get("expoentes", {}).get(task.tipo, 1.0)
+            if len(lote) > 1:
+                print(
+                    f"[{format_tempo_relativo(inicio_global)}] [SRV-{id_worker}] Executando lote de "
+                    f"{len(lote)} requisições {task.tipo}: {[t.id for t in lote]}"
+                )
+
+        duracao = custo_lote(task.custo_estimado, len(lote), expoente) / velocidade
+        duracao_prevista = duracao
+        duracao *= aplicar_falha_simulada(falha_simulada, tarefas_executadas, id_worker, inicio_global)
+
         start_time = time.time()
-        time.sleep(task.custo_estimado)
+        executar_tarefa(duracao, id_worker, task.id, heartbeat_queue, intervalo_heartbeat, duracao_prevista)
         end_time = time.time()
+        tarefas_executadas += len(lote)
 
         tempo_execucao = end_time - start_time
-        tempo_espera = start_time - task.criacao
 
-        resultado = Result(task.id, id_worker, tempo_espera, tempo_execucao)
-        result_queue.put(resultado)
+        for i, t in enumerate(lote):
+            tempo_espera = start_time - t.criacao
+            resultado = Result(t.id, id_worker, tempo_espera, tempo_execucao, len(lote), i == 0, t.tipo,
+                               despacho=t.despacho, retirada=t.retirada, inicio=start_time, fim=end_time,
+                               cliente=t.cliente)
+            result_queue.put(resultado)
+
+
+def worker_process_preemptivo(id_worker: int,
+                              task_queue: multiprocessing.Queue,
+                              result_queue: multiprocessing.Queue,
+                              inicio_global: float,
+                              heartbeat_queue: Optional[multiprocessing.Queue],
+                              intervalo_heartbeat: float,
+                              falha_simulada: Optional[Dict],
+                              controle_queue: multiprocessing.Queue,
+                              quantum: float,
+                              modo: str,
+                              velocidade: float = 1.0):
+    print(f"[{format_tempo_relativo(inicio_global)}] [SRV-{id_worker}] Iniciado (preemptivo, quantum={quantum}s)...")
+
+    tarefas_executadas = 0
+    prontas = []
+    ocupado_local = {}
+    encerrar = False
+
+    while True:
+        try:
+            while True:
+                t = task_queue.get_nowait()
+                registrar_retirada(t)
+                if t is None:
+                    encerrar = True
+                else:
+                    prontas.append(t)
+        except queue.Empty:
+            pass
+
+        if not prontas:
+            if encerrar:
+                print(f"[{format_tempo_relativo(inicio_global)}] [SRV-{id_worker}] Recebida poison pill. Encerrando.")
+                break
+            try:
+                t = task_queue.get(timeout=intervalo_heartbeat)
+            except queue.Empty:
+                enviar_heartbeat(heartbeat_queue, id_worker)
+                continue
+            registrar_retirada(t)
+            if t is None:
+                encerrar = True
+            else:
+                prontas.append(t)
+            continue
+
+        if modo == "srtf":
+            task = min(prontas, key=lambda t: t.restante)
+            prontas.remove(task)
+        else:
+            task = prontas.pop(0)
+
+        trecho = min(quantum, task.restante)
+        fator = aplicar_falha_simulada(falha_simulada, tarefas_executadas, id_worker, inicio_global)
+
+        start_time = time.time()
+        if not task.inicio_execucao:
+            task.inicio_execucao = start_time
+        executar_tarefa(trecho * fator / velocidade, id_worker, task.id, heartbeat_queue, intervalo_heartbeat,
+                        task.restante / velocidade)
+        end_time = time.time()
+
+        task.executado += trecho
+        task.tempo_cpu += end_time - start_time
+        ocupado_local[task.id] = ocupado_local.get(task.id, 0.0) + (end_time - start_time)
+
+        if task.restante <= 1e-9:
+            tarefas_executadas += 1
+            resultado = Result(
+                task.id, id_worker,
+                tempo_espera=end_time - task.criacao - task.tempo_cpu,
+                tempo_execucao=task.tempo_cpu,
+                tipo=task.tipo,
+                tempo_servidor=ocupado_local.pop(task.id),
+                despacho=task.despacho,
+                retirada=task.retirada,
+                inicio=task.inicio_execucao,
+                fim=end_time,
+                cliente=task.cliente,
+            )
+            result_queue.put(resultado)
+            continue
+
+        prontas.append(task)
+
+        pedidos = set()
+        try:
+            while True:
+                pedidos.add(controle_queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        for t in [t for t in prontas if t.id in pedidos]:
+            prontas.remove(t)
+            result_queue.put(Suspensao(t, id_worker, ocupado_local.pop(t.id, 0.0)))
+            print(
+                f"[{format_tempo_relativo(inicio_global)}] [SRV-{id_worker}] Requisição {t.id} suspensa "
+                f"(restante={t.restante:.1f}s). Devolvida ao orquestrador."
+            )
+
+
+def iniciar_worker(servidor: Servidor,
+                   result_queue: multiprocessing.Queue,
+                   heartbeat_queue: multiprocessing.Queue,
+                   inicio_simulacao: float,
+                   intervalo_heartbeat: float,
+                   falha: Optional[Dict],
+                   config_lote: Optional[Dict],
+                   velocidade: float,
+                   preemptivo: bool,
+                   quantum: float,
+                   modo_preempcao: str) -> Tuple[multiprocessing.Queue, Optional[multiprocessing.Queue], multiprocessing.Process]:
+    """Cria o processo de um servidor; retorna a fila de tarefas, a de controle (só no modo preemptivo) e o processo."""
+    q = multiprocessing.Queue()
+    controle = None
+    if preemptivo:
+        controle = multiprocessing.Queue()
+        p = multiprocessing.Process(
+            target=worker_process_preemptivo,
+            args=(servidor.id, q, result_queue, inicio_simulacao, heartbeat_queue, intervalo_heartbeat, falha,
+                  controle, quantum, modo_preempcao, velocidade)
+        )
+    else:
+        p = multiprocessing.Process(
+            target=worker_process,
+            args=(servidor.id, q, result_queue, inicio_simulacao, heartbeat_queue, intervalo_heartbeat, falha,
+                  config_lote, velocidade)
+        )
+    p.start()
+    return q, controle, p
+
+
+def processo_residente(task_queue: multiprocessing.Queue,
+                       controle_queue: multiprocessing.Queue,
+                       config_queue: multiprocessing.Queue,
+                       result_queue: multiprocessing.Queue,
+                       heartbeat_queue: multiprocessing.Queue):
+    """
+    Processo do PoolServidores: a cada Reconfiguracao assume o papel de um Servidor
+    e executa o worker correspondente até a poison pill da rodada. O FimRodada vai
+    pela result_queue depois de todos os resultados do worker, então o orquestrador
+    sabe que nada da rodada ficou para trás. None na config_queue encerra o processo.
+    """
+    while True:
+        cfg = config_queue.get()
+        if cfg is None:
+            break
+
+        try:
+            while True:
+                controle_queue.get_nowait()
+        except queue.Empty:
+            pass
+
+        if cfg.preemptivo:
+            worker_process_preemptivo(
+                cfg.worker_id, task_queue, result_queue, cfg.inicio_global, heartbeat_queue,
+                cfg.intervalo_heartbeat, cfg.falha_simulada, controle_queue, cfg.quantum, cfg.modo, cfg.velocidade
+            )
+        else:
+            worker_process(
+                cfg.worker_id, task_queue, result_queue, cfg.inicio_global, heartbeat_queue,
+                cfg.intervalo_heartbeat, cfg.falha_simulada, cfg.config_lote, cfg.velocidade
+            )
+        result_queue.put(FimRodada(cfg.worker_id))
+
+
+class PoolServidores:
+    """
+    Conjunto de processos de servidor reaproveitado entre simulações no mesmo processo
+    (rodadas do comparador). Os processos são criados via forkserver (spawn onde não
+    houver) e, a cada rodada, recebem uma Reconfiguracao que os vincula aos Servidores
+    ativos, sem precisar criar novos processos.
+
+    Se algum processo for encerrado à força durante a rodada (falha detectada por
+    heartbeat), as filas compartilhadas podem ter ficado inconsistentes; nesse caso o
+    pool inteiro é recriado na rodada seguinte.
+    """
+    def __init__(self, metodo: str = "forkserver"):
+        if metodo not in multiprocessing.get_all_start_methods():
+            metodo = "spawn"
+        self.contexto = multiprocessing.get_context(metodo)
+        if metodo == "forkserver" and __name__ != "__main__":
+            self.contexto.set_forkserver_preload([__name__])
+        self.processos_criados = 0
+        self._criar_filas()
+
+    def _criar_filas(self):
+        self.result_queue = self.contexto.Queue()
+        self.heartbeat_queue = self.contexto.Queue()
+        self.slots: List[Tuple[multiprocessing.Process, multiprocessing.Queue,
+                               multiprocessing.Queue, multiprocessing.Queue]] = []
+        self.vinculados: Dict[int, int] = {}
+        self.reiniciar = False
+
+    def _criar_slot(self):
+        task_queue = self.contexto.Queue()
+        controle_queue = self.contexto.Queue()
+        config_queue = self.contexto.Queue()
+        p = self.contexto.Process(
+            target=processo_residente,
+            args=(task_queue, controle_queue, config_queue, self.result_queue, self.heartbeat_queue),
+            daemon=True,
+        )
+        p.start()
+        self.processos_criados += 1
+        self.slots.append((p, task_queue, controle_queue, config_queue))
+
+    def vincular(self, servidores_ativos: List[Servidor], configuracoes: Dict[int, Reconfiguracao]):
+        if self.reiniciar:
+            self.encerrar()
+            self._criar_filas()
+
+        while len(self.slots) < len(servidores_ativos):
+            self._criar_slot()
+
+        task_queues, controle_queues, processos = {}, {}, {}
+        self.vinculados = {}
+        for indice, s in enumerate(servidores_ativos):
+            p, task_queue, controle_queue, config_queue = self.slots[indice]
+            config_queue.put(configuracoes[s.id])
+            task_queues[s.id] = task_queue
+            controle_queues[s.id] = controle_queue
+            processos[s.id] = p
+            self.vinculados[s.id] = indice
+        return task_queues, controle_queues, processos
+
+    def liberar(self, ids_ativos: List[int], timeout: float) -> bool:
+        """
+        Aguarda o FimRodada de cada servidor ainda ativo, descartando resultados tardios.
+        Retorna False (e marca o pool para ser recriado) se algum não responder a tempo
+        ou se algum processo vinculado tiver sido encerrado durante a rodada.
+        """
+        pendentes = set(ids_ativos)
+        limite = time.time() + timeout
+        while pendentes and time.time() < limite:
+            try:
+                item = self.result_queue.get(timeout=max(0.0, limite - time.time()))
+            except queue.Empty:
+                break
+            if isinstance(item, FimRodada):
+                pendentes.discard(item.worker_id)
+
+        mortos = [sid for sid, i in self.vinculados.items() if not self.slots[i][0].is_alive()]
+        self.reiniciar = self.reiniciar or bool(pendentes) or bool(mortos)
+        return not self.reiniciar
+
+    def encerrar(self):
+        for p, _, _, config_queue in self.slots:
+            if p.is_alive():
+                config_queue.put(None)
+        for p, *_ in self.slots:
+            p.join(timeout=1.0)
+            if p.is_alive():
+                p.terminate()
+                p.join()
+        self.slots = []
+
+
+def selecionar_preempcoes(politica: str,
+                          fila_pronta: List[Task],
+                          tarefas_em_voo: Dict[int, Tuple[int, Task]],
+                          execucao_atual: Dict[int, Tuple[int, float, float]],
+                          suspensoes_pedidas: set,
+                          inicio_no_servidor: Dict[int, Tuple[int, float]],
+                          quantum: float) -> List[Tuple[int, int]]:
+    """
+    Escolhe as requisições em execução que devem ser devolvidas à fila_pronta. No
+    round_robin_quantum, só é devolvida a requisição que já ocupa o servidor atual há
+    pelo menos um quantum (inicio_no_servidor: id -> (servidor, primeiro heartbeat
+    da requisição nele)); sem isso, todo ciclo com fila pediria novas suspensões.
+    """
+    if not fila_pronta:
+        return []
+
+    agora = time.time()
+    em_execucao = {tid: inicio for tid, inicio, _ in execucao_atual.values()}
+
+    def restante_estimado(tarefa: Task) -> float:
+        if tarefa.id in em_execucao:
+            return max(0.0, tarefa.restante - (agora - em_execucao[tarefa.id]))
+        return tarefa.restante
+
+    candidatas = [
+        (tid, sid, tarefa) for tid, (sid, tarefa) in tarefas_em_voo.items()
+        if tid not in suspensoes_pedidas
+    ]
+    vagas = len(fila_pronta) - len(suspensoes_pedidas)
+    pedidos = []
+
+    if politica == "srtf":
+        menor_espera = min(t.restante for t in fila_pronta)
+        candidatas.sort(key=lambda c: restante_estimado(c[2]), reverse=True)
+        for tid, sid, tarefa in candidatas[:max(0, vagas)]:
+            if restante_estimado(tarefa) <= menor_espera:
+                break
+            pedidos.append((sid, tid))
+    else:
+        # tarefas_em_voo preserva a ordem de despacho: as mais antigas são devolvidas primeiro
+        for tid, sid, tarefa in candidatas:
+            if len(pedidos) >= vagas:
+                break
+            servidor, inicio = inicio_no_servidor.get(tid, (None, agora))
+            if tid in em_execucao and servidor == sid and agora - inicio >= quantum:
+                pedidos.append((sid, tid))
+
+    return pedidos
+
+
+def verificar_saude_servidores(servidores_ativos: List[Servidor],
+                               processos: Dict[int, multiprocessing.Process],
+                               cargas_servidor: Dict[int, int],
+                               tarefas_em_voo: Dict[int, Tuple[int, Task]],
+                               execucao_atual: Dict[int, Tuple[int, float, float]],
+                               ultimo_heartbeat: Dict[int, float],
+                               fila_pronta: List[Task],
+                               config_extra: Dict,
+                               inicio_simulacao: float,
+                               cargas_lock: multiprocessing.Lock, # type: ignore
+                               fila_justa: Optional[FilaJustaClientes] = None) -> Tuple[int, int]:
+    timeout_heartbeat = config_extra.get("timeout_heartbeat", 5.0)
+    fator_timeout = config_extra.get("fator_timeout_tarefa", 3.0)
+    agora = time.time()
+    reenviadas = 0
+    falhos = 0
+
+    for s in list(servidores_ativos):
+        sid = s.id
+        sem_sinal = agora - ultimo_heartbeat[sid] > timeout_heartbeat
+        if not sem_sinal and processos[sid].is_alive():
+            continue
+
+        ts = format_tempo_relativo(inicio_simulacao)
+        print(f"[{ts}] [HB] Servidor {sid} sem heartbeat há {agora - ultimo_heartbeat[sid]:.1f}s. Removendo do cluster.")
+
+        processos[sid].terminate()
+        servidores_ativos.remove(s)
+        execucao_atual.pop(sid, None)
+        with cargas_lock:
+            cargas_servidor.pop(sid, None)
+        falhos += 1
+
+        for tid, (sid_tarefa, tarefa) in list(tarefas_em_voo.items()):
+            if sid_tarefa != sid:
+                continue
+            del tarefas_em_voo[tid]
+            fila_pronta.insert(0, tarefa)
+            if fila_justa is not None:
+                fila_justa.adicionar(tarefa, na_frente=True)
+            reenviadas += 1
+            print(f"[{ts}] [HB] Requisição {tid} reenviada (servidor {sid} falhou).")
+
+    for sid, (tid, inicio, duracao_prevista) in list(execucao_atual.items()):
+        if tid not in tarefas_em_voo or tarefas_em_voo[tid][0] != sid:
+            continue
+
+        tarefa = tarefas_em_voo[tid][1]
+        limite = max(tarefa.custo_estimado, duracao_prevista) * fator_timeout
+        if agora - inicio <= limite:
+            continue
+
+        # O worker continua ocupado com a tarefa original, então a carga não é liberada aqui;
+        # ela só é descontada quando (e se) o resultado tardio chegar.
+        del tarefas_em_voo[tid]
+        tarefa.servidores_excluidos = tarefa.servidores_excluidos + (sid,)
+        fila_pronta.insert(0, tarefa)
+        if fila_justa is not None:
+            fila_justa.adicionar(tarefa, na_frente=True)
+        reenviadas += 1
+
+        ts = format_tempo_relativo(inicio_simulacao)
+        print(
+            f"[{ts}] [HB] Requisição {tid} excedeu {limite:.1f}s no Servidor {sid}. "
+            f"Reenviando para outro servidor."
+        )
+
+    return reenviadas, falhos
 
 
 def migrar_tarefas_dinamicas(task_queues: Dict[int, multiprocessing.Queue],
                              cargas_servidor: Dict[int, int],
                              servidores_ativos: List[Servidor],
                              inicio_simulacao: float,
-                             cargas_lock: multiprocessing.Lock) -> Dict[int, int]: # type: ignore
+                             cargas_lock: multiprocessing.Lock, # type: ignore
+                             tarefas_em_voo: Optional[Dict[int, Tuple[int, Task]]] = None,
+                             pools: Optional[List[PoolAfinidade]] = None) -> Dict[int, int]:
+    """
+    Move uma tarefa da fila do servidor mais carregado para a do menos carregado
+    quando a diferença de carga relativa passa de 50%. Com pools (escalonamento em
+    dois níveis), a migração acontece dentro de cada pool e só para tarefas de tipos
+    que ele atende, preservando o isolamento entre pools. O servidor de destino nunca
+    está em servidores_excluidos da tarefa; sem destino válido, ela volta para a
+    fila de origem.
+    """
     capacidades = {s.id: s.capacidade for s in servidores_ativos}
     
     with cargas_lock:
         cargas_relativas = {
             sid: cargas_servidor[sid] / capacidades[sid]
             for sid in cargas_servidor.keys()
-            if capacidades[sid] > 0
+            if capacidades.get(sid, 0) > 0
         }
-    
-    if not cargas_relativas or len(cargas_relativas) < 2:
-        return cargas_servidor
-    
-    sid_max = max(cargas_relativas, key=cargas_relativas.get)# type: ignore
-    sid_min = min(cargas_relativas, key=cargas_relativas.get)# type: ignore
-    
-    diferenca = cargas_relativas[sid_max] - cargas_relativas[sid_min]
-    
-    if diferenca > 0.5:
+
+    if pools is None:
+        grupos = [(None, tuple(cargas_relativas))]
+    else:
+        grupos = [(p.tipos, p.servidores) for p in pools]
+
+    for tipos, servidores_grupo in grupos:
+        cargas = {sid: cargas_relativas[sid] for sid in servidores_grupo if sid in cargas_relativas}
+        if len(cargas) < 2:
+            continue
+
+        sid_max = max(cargas, key=cargas.get)# type: ignore
+        if cargas[sid_max] - min(cargas.values()) <= 0.5:
+            continue
+
         try:
             tarefa = task_queues[sid_max].get_nowait()
-            
-            task_queues[sid_min].put(tarefa)
-            
-            with cargas_lock:
-                cargas_servidor[sid_max] -= 1
-                cargas_servidor[sid_min] += 1
-            
-            ts = format_tempo_relativo(inicio_simulacao)
-            print(
-                f"[{ts}] [MIG] Tarefa {tarefa.id} migrada do Servidor {sid_max} "
-                f"(carga {cargas_relativas[sid_max]:.0%}) para Servidor {sid_min} "
-                f"(carga {cargas_relativas[sid_min]:.0%})"
-            )
         except queue.Empty:
-            pass
+            continue
+
+        destinos = [
+            sid for sid in sorted(cargas, key=cargas.get)# type: ignore
+            if cargas[sid_max] - cargas[sid] > 0.5 and sid not in tarefa.servidores_excluidos
+        ]
+        if not destinos or (tipos is not None and tarefa.tipo not in tipos):
+            task_queues[sid_max].put(tarefa)
+            continue
+        sid_min = destinos[0]
+
+        task_queues[sid_min].put(tarefa)
+        if tarefas_em_voo is not None:
+            tarefas_em_voo[tarefa.id] = (sid_min, tarefa)
+
+        with cargas_lock:
+            cargas_servidor[sid_max] -= 1
+            cargas_servidor[sid_min] += 1
+
+        ts = format_tempo_relativo(inicio_simulacao)
+        print(
+            f"[{ts}] [MIG] Tarefa {tarefa.id} migrada do Servidor {sid_max} "
+            f"(carga {cargas[sid_max]:.0%}) para Servidor {sid_min} "
+            f"(carga {cargas[sid_min]:.0%})"
+        )
     
     return cargas_servidor
 
@@ -269,15 +1131,26 @@ def despachar_tarefas(fila_pronta: List[Task],
                       cargas_servidor: Dict[int, int],
                       indice_rr: int,
                       inicio_simulacao: float,
-                      cargas_lock: multiprocessing.Lock) -> Tuple[int, Dict[int, int]]: # type: ignore
+                      cargas_lock: multiprocessing.Lock, # type: ignore
+                      tarefas_em_voo: Optional[Dict[int, Tuple[int, Task]]] = None,
+                      afinidade_tipo: bool = False,
+                      limite: Optional[int] = None,
+                      concluidas: Optional[Set[int]] = None) -> Tuple[int, Dict[int, int]]:
     politica = politica.lower()
+    ids_ativos = {s.id for s in servidores_ativos}
+    despachadas = 0
 
-    while fila_pronta:
+    while fila_pronta and (limite is None or despachadas < limite):
         if politica == "sjf":
             idx_tarefa = min(
                 range(len(fila_pronta)),
                 key=lambda i: fila_pronta[i].custo_estimado
             )
+        elif politica == "srtf":
+            idx_tarefa = min(
+                range(len(fila_pronta)),
+                key=lambda i: fila_pronta[i].restante
+            )
         elif politica == "prioridade":
             idx_tarefa = min(
                 range(len(fila_pronta)),
@@ -287,11 +1160,19 @@ def despachar_tarefas(fila_pronta: List[Task],
             idx_tarefa = 0
 
         tarefa = fila_pronta.pop(idx_tarefa)
+        if concluidas is not None and tarefa.id in concluidas:
+            # Cópia de uma requisição reenviada cujo resultado original já chegou: descartada aqui,
+            # em vez de varrer a fila_pronta a cada resultado
+            continue
+
+        excluidos = set(tarefa.servidores_excluidos)
+        if ids_ativos <= excluidos:
+            excluidos = set()
 
         servidor_escolhido = None
         servidor_preferido = None
 
-        if politica == "round_robin":
+        if politica in ("round_robin", "round_robin_quantum"):
             num_servers = len(servidores_ativos)
             if num_servers == 0:
                 fila_pronta.insert(0, tarefa)
@@ -306,7 +1187,7 @@ def despachar_tarefas(fila_pronta: List[Task],
                     servidor_preferido = s
 
                 with cargas_lock:
-                    if cargas_servidor[sid] < s.capacidade:
+                    if sid not in excluidos and cargas_servidor[sid] < s.capacidade:
                         servidor_escolhido = s
                         indice_rr = (indice_rr + 1) % num_servers
                         break
@@ -330,17 +1211,25 @@ def despachar_tarefas(fila_pronta: List[Task],
             with cargas_lock:
                 servidores_disponiveis = [
                     s for s in servidores_ativos
-                    if cargas_servidor[s.id] < s.capacidade
+                    if s.id not in excluidos and cargas_servidor[s.id] < s.capacidade
                 ]
             
             if not servidores_disponiveis:
                 fila_pronta.insert(0, tarefa)
                 break
 
+            mesmo_tipo = {}
+            if afinidade_tipo and tarefas_em_voo:
+                for sid_voo, t in tarefas_em_voo.values():
+                    if t.tipo == tarefa.tipo:
+                        mesmo_tipo[sid_voo] = mesmo_tipo.get(sid_voo, 0) + 1
+
+            # Com lotes habilitados, servidores que já têm requisições do mesmo tipo
+            # são preferidos para que o worker consiga agrupá-las.
             with cargas_lock:
                 servidor_escolhido = min(
                     servidores_disponiveis,
-                    key=lambda s: cargas_servidor[s.id] / s.capacidade
+                    key=lambda s: (0 if mesmo_tipo.get(s.id) else 1, cargas_servidor[s.id] / s.capacidade)
                 )
 
         sid = servidor_escolhido.id
@@ -352,14 +1241,515 @@ def despachar_tarefas(fila_pronta: List[Task],
             f"(tipo={tarefa.tipo}, custo={tarefa.custo_estimado}s)"
         )
 
+        if not tarefa.despacho:
+            tarefa.despacho = time.time()
         task_queues[sid].put(tarefa)
+        if tarefas_em_voo is not None:
+            tarefas_em_voo[tarefa.id] = (sid, tarefa)
         
         with cargas_lock:
             cargas_servidor[sid] += 1
+        despachadas += 1
+
+    return indice_rr, cargas_servidor
+
+
+def despachar_com_clientes(fila_pronta: List[Task],
+                           fila_justa: FilaJustaClientes,
+                           politica: str,
+                           task_queues: Dict[int, multiprocessing.Queue],
+                           servidores_ativos: List[Servidor],
+                           cargas_servidor: Dict[int, int],
+                           indice_rr: int,
+                           inicio_simulacao: float,
+                           cargas_lock: multiprocessing.Lock, # type: ignore
+                           tarefas_em_voo: Optional[Dict[int, Tuple[int, Task]]] = None,
+                           afinidade_tipo: bool = False) -> Tuple[int, Dict[int, int]]:
+    """
+    Despacho com fila justa entre clientes: a ordem das requisições vem do deficit
+    round robin de fila_justa (FIFO dentro de cada cliente) e o servidor de cada uma
+    é escolhido pela política configurada. Para na primeira requisição sem servidor livre.
+    """
+    despachadas = 0
+    while True:
+        tarefa = fila_justa.proxima()
+        if tarefa is None:
+            break
+        pendente = [tarefa]
+        indice_rr, cargas_servidor = despachar_tarefas(
+            fila_pronta=pendente,
+            politica=politica,
+            task_queues=task_queues,
+            servidores_ativos=servidores_ativos,
+            cargas_servidor=cargas_servidor,
+            indice_rr=indice_rr,
+            inicio_simulacao=inicio_simulacao,
+            cargas_lock=cargas_lock,
+            tarefas_em_voo=tarefas_em_voo,
+            afinidade_tipo=afinidade_tipo,
+        )
+        if pendente:
+            fila_justa.devolver(tarefa)
+            break
+        despachadas += 1
 
+    if despachadas:
+        fila_pronta[:] = [t for t in fila_pronta if t.id in fila_justa.enfileiradas]
     return indice_rr, cargas_servidor
 
 
+def montar_pools(cfg_pools: Dict,
+                 servidores: List[Servidor],
+                 tipos_requisicoes: List[TipoRequisicao]) -> List[PoolAfinidade]:
+    """
+    Lê os grupos de "pools" do config. Tipos que não aparecem em nenhum grupo formam
+    o pool "geral", com os servidores que também não têm grupo (ou com todos, se não
+    sobrar nenhum; nesse caso ele é atendido depois dos demais).
+    """
+    pools = [
+        PoolAfinidade(
+            nome=g["nome"],
+            servidores=tuple(g.get("servidores", [])),
+            tipos=tuple(g.get("tipos", [])),
+            peso=g.get("peso", 1.0),
+        )
+        for g in cfg_pools.get("grupos", [])
+    ]
+    tipos_livres = tuple(t.tipo for t in tipos_requisicoes if not any(t.tipo in p.tipos for p in pools))
+    if pools and tipos_livres:
+        com_pool = {sid for p in pools for sid in p.servidores}
+        livres = tuple(s.id for s in servidores if s.id not in com_pool) or tuple(s.id for s in servidores)
+        pools.append(PoolAfinidade("geral", livres, tipos_livres))
+    return pools
+
+
+def despachar_com_pools(fila_pronta: List[Task],
+                        pools: List[PoolAfinidade],
+                        estado_pools: Dict[str, Dict],
+                        transbordo: bool,
+                        politica: str,
+                        task_queues: Dict[int, multiprocessing.Queue],
+                        servidores_ativos: List[Servidor],
+                        cargas_servidor: Dict[int, int],
+                        inicio_simulacao: float,
+                        cargas_lock: multiprocessing.Lock, # type: ignore
+                        tarefas_em_voo: Dict[int, Tuple[int, Task]],
+                        afinidade_tipo: bool = False,
+                        concluidas: Optional[Set[int]] = None) -> Dict[int, int]:
+    """
+    Escalonamento em dois níveis. A fila_pronta é separada em uma fila por pool (pelo
+    tipo da requisição) e cada pool despacha a sua fila, com a política configurada,
+    apenas nos seus servidores. Em seguida, se transbordo estiver habilitado, a
+    capacidade livre dos pools sem fila é repartida entre os pools com fila por
+    fila justa ponderada: a cada requisição transbordada, é atendido o pool com
+    menor custo transbordado acumulado / peso.
+
+    estado_pools guarda, por pool, o índice do round robin, o custo transbordado
+    (usado na fila justa) e o número de requisições transbordadas.
+    """
+    pool_do_tipo = {tipo: p.nome for p in pools for tipo in p.tipos}
+    filas = {p.nome: [] for p in pools}
+    for t in fila_pronta:
+        if concluidas is not None and t.id in concluidas:
+            # cópia obsoleta de uma requisição reenviada; sai da fila_pronta junto com as despachadas
+            continue
+        filas[pool_do_tipo.get(t.tipo, pools[-1].nome)].append(t)
+
+    ativos = {s.id: s for s in servidores_ativos}
+    servidores_pool = {p.nome: [ativos[sid] for sid in p.servidores if sid in ativos] for p in pools}
+
+    # Um pool sem servidores ativos (falhas, ou shard sem nenhum servidor dele) usa a
+    # capacidade que sobrar no cluster, para que suas requisições não fiquem presas.
+    for p in sorted(pools, key=lambda p: not servidores_pool[p.nome]):
+        estado = estado_pools[p.nome]
+        servidores = servidores_pool[p.nome] or servidores_ativos
+        if not filas[p.nome] or not servidores:
+            continue
+        estado["indice_rr"] %= len(servidores)
+        estado["indice_rr"], cargas_servidor = despachar_tarefas(
+            fila_pronta=filas[p.nome],
+            politica=politica,
+            task_queues=task_queues,
+            servidores_ativos=servidores,
+            cargas_servidor=cargas_servidor,
+            indice_rr=estado["indice_rr"],
+            inicio_simulacao=inicio_simulacao,
+            cargas_lock=cargas_lock,
+            tarefas_em_voo=tarefas_em_voo,
+            afinidade_tipo=afinidade_tipo,
+        )
+
+    if transbordo:
+        ociosos = [p.nome for p in pools if not filas[p.nome]]
+        doadores = [s for nome in ociosos for s in servidores_pool[nome]]
+        doadores = list({s.id: s for s in doadores}.values())
+        candidatos = [p for p in pools if filas[p.nome]]
+        indice_doadores = 0
+
+        while candidatos and doadores:
+            p = min(candidatos, key=lambda p: estado_pools[p.nome]["custo_transbordado"] / p.peso)
+            antes = {t.id: t for t in filas[p.nome]}
+            indice_doadores %= len(doadores)
+            indice_doadores, cargas_servidor = despachar_tarefas(
+                fila_pronta=filas[p.nome],
+                politica=politica,
+                task_queues=task_queues,
+                servidores_ativos=doadores,
+                cargas_servidor=cargas_servidor,
+                indice_rr=indice_doadores,
+                inicio_simulacao=inicio_simulacao,
+                cargas_lock=cargas_lock,
+                tarefas_em_voo=tarefas_em_voo,
+                afinidade_tipo=afinidade_tipo,
+                limite=1,
+            )
+            enviadas = antes.keys() - {t.id for t in filas[p.nome]}
+            if not enviadas:
+                candidatos.remove(p)
+                continue
+
+            for tid in enviadas:
+                estado_pools[p.nome]["custo_transbordado"] += antes[tid].custo_estimado
+                estado_pools[p.nome]["transbordadas"] += 1
+                print(
+                    f"[{format_tempo_relativo(inicio_simulacao)}] [POOL] Requisição {tid} do pool "
+                    f"{p.nome} transbordou para o Servidor {tarefas_em_voo[tid][0]}."
+                )
+            if not filas[p.nome]:
+                candidatos.remove(p)
+
+    restantes = {t.id for fila in filas.values() for t in fila}
+    fila_pronta[:] = [t for t in fila_pronta if t.id in restantes]
+    return cargas_servidor
+
+
+def construir_anel_hash(num_shards: int, vnodes: int = 64) -> Tuple[List[int], List[int]]:
+    pontos = sorted(
+        (int(hashlib.md5(f"shard-{i}-{v}".encode()).hexdigest()[:16], 16), i)
+        for i in range(num_shards)
+        for v in range(vnodes)
+    )
+    return [h for h, _ in pontos], [i for _, i in pontos]
+
+
+def shard_por_hash(anel: Tuple[List[int], List[int]], chave: str) -> int:
+    hashes, shards = anel
+    h = int(hashlib.md5(chave.encode()).hexdigest()[:16], 16)
+    return shards[bisect.bisect(hashes, h) % len(hashes)]
+
+
+def roteador_shards(fila_entrada: multiprocessing.Queue,
+                    filas_shards: List[multiprocessing.Queue],
+                    modo: str,
+                    cargas_shards,
+                    inicio_global: float):
+    anel = construir_anel_hash(len(filas_shards))
+    roteadas = [0] * len(filas_shards)
+
+    print(f"[{format_tempo_relativo(inicio_global)}] [RTR] Roteador iniciado ({len(filas_shards)} shards, modo={modo}).")
+
+    while True:
+        task = fila_entrada.get()
+        if task is None:
+            break
+
+        if modo == "menor_carga":
+            idx = min(range(len(filas_shards)), key=lambda i: cargas_shards[i])
+        else:
+            idx = shard_por_hash(anel, task.chave or str(task.id))
+
+        filas_shards[idx].put(task)
+        roteadas[idx] += 1
+
+    print(f"[{format_tempo_relativo(inicio_global)}] [RTR] Entrada encerrada. Requisições por shard: {roteadas}")
+    for q in filas_shards:
+        q.put(None)
+
+
+def rebalancear_shards(fila_pronta: List[Task],
+                       contexto_shard: Dict,
+                       aguardando_lider: Dict,
+                       inicio_simulacao: float,
+                       fila_justa: Optional[FilaJustaClientes] = None,
+                       concluidas: Optional[Set[int]] = None) -> int:
+    cargas = contexto_shard["cargas"]
+    finalizados = contexto_shard["finalizados"]
+    meu_id = contexto_shard["id"]
+    destino = min(
+        (i for i in range(len(cargas)) if i != meu_id and not finalizados[i]),
+        key=lambda i: cargas[i], default=None
+    )
+
+    if destino is None or cargas[meu_id] - cargas[destino] <= contexto_shard["limiar"]:
+        return 0
+
+    # Quantidade que iguala a pressão (tarefas / capacidade) dos dois shards.
+    cap_origem = contexto_shard["capacidades"][meu_id]
+    cap_destino = contexto_shard["capacidades"][destino]
+    quantidade = int((cargas[meu_id] - cargas[destino]) / (1 / cap_origem + 1 / cap_destino))
+
+    # Líderes de cache ficam no shard de origem, onde estão as requisições coalescidas.
+    # Cópias obsoletas de requisições reenviadas (já concluídas) nunca são repassadas.
+    doaveis = [t for t in fila_pronta if t.id not in aguardando_lider and t.id not in (concluidas or ())]
+    doar = doaveis[len(doaveis) - min(quantidade, len(doaveis)):] if quantidade > 0 else []
+    if not doar:
+        return 0
+
+    # O lock garante que o destino não encerre entre a verificação e o envio.
+    with contexto_shard["lock"]:
+        if finalizados[destino]:
+            return 0
+        with contexto_shard["doacoes"].get_lock():
+            contexto_shard["doacoes"].value += len(doar)
+        for t in doar:
+            t.doada = True
+            contexto_shard["filas"][destino].put(t)
+        cargas[meu_id] -= len(doar) / cap_origem
+        cargas[destino] += len(doar) / cap_destino
+
+    ids = {t.id for t in doar}
+    fila_pronta[:] = [t for t in fila_pronta if t.id not in ids]
+    if fila_justa is not None:
+        fila_justa.remover(ids)
+
+    ts = format_tempo_relativo(inicio_simulacao)
+    print(f"[{ts}] [SHD] {len(doar)} requisições repassadas do Shard {meu_id} para o Shard {destino}.")
+    return len(doar)
+
+
+def finalizar_shard(contexto_shard: Dict) -> bool:
+    with contexto_shard["lock"]:
+        if contexto_shard["doacoes"].value > 0:
+            return False
+        contexto_shard["finalizados"][contexto_shard["id"]] = 1
+        return True
+
+
+def combinar_metricas_shards(
+        parciais: List[Tuple[int, Optional[Dict], Dict[str, List[float]], Dict[str, List[float]]]]) -> Optional[Dict]:
+    """parciais: (id do shard, métricas, respostas por tipo, respostas por cliente) de cada shard."""
+    validas = [(m, r) for _, m, r, _ in parciais if m]
+    if not validas:
+        return None
+
+    total = sum(m["tarefas_processadas"] for m, _ in validas)
+    tempo_total = max(m["tempo_total_simulacao"] for m, _ in validas)
+
+    def media_ponderada(chave: str) -> float:
+        return sum(m[chave] * m["tarefas_processadas"] for m, _ in validas) / total
+
+    utilizacao_por_servidor = {}
+    for m, _ in validas:
+        utilizacao_por_servidor.update(m["utilizacao_por_servidor"])
+
+    respostas_por_tipo = {}
+    for _, r in validas:
+        for tipo, valores in r.items():
+            respostas_por_tipo.setdefault(tipo, []).extend(valores)
+    todas_respostas = [r for valores in respostas_por_tipo.values() for r in valores]
+
+    combinadas = {
+        "execucao": validas[0][0].get("execucao"),
+        "politica": validas[0][0]["politica"],
+        "shards": len(parciais),
+        "tarefas_processadas": total,
+        "tempo_total_simulacao": round(tempo_total, 2),
+        "tempo_medio_espera": round(media_ponderada("tempo_medio_espera"), 2),
+        "tempo_maximo_espera": max(m["tempo_maximo_espera"] for m, _ in validas),
+        "tempo_medio_execucao": round(media_ponderada("tempo_medio_execucao"), 2),
+        "tempo_medio_resposta": round(media_ponderada("tempo_medio_resposta"), 2),
+        "throughput": round(total / tempo_total, 2),
+        "utilizacao_media_cpu": round(sum(utilizacao_por_servidor.values()) / len(utilizacao_por_servidor), 1),
+        "tarefas_reenviadas": sum(m["tarefas_reenviadas"] for m, _ in validas),
+        "servidores_falhos": sum(m["servidores_falhos"] for m, _ in validas),
+        "instante_primeiro_despacho": min(
+            (m["instante_primeiro_despacho"] for m, _ in validas if m.get("instante_primeiro_despacho")),
+            default=None,
+        ),
+        "preempcoes": sum(m["preempcoes"] for m, _ in validas),
+        "requisicoes_repassadas": sum(m.get("requisicoes_repassadas", 0) for m, _ in validas),
+        "tempo_resposta_p95": round(percentil(todas_respostas, 95), 2),
+        "tempo_resposta_p99": round(percentil(todas_respostas, 99), 2),
+        "latencia_por_tipo": {tipo: resumo_latencias(v) for tipo, v in sorted(respostas_por_tipo.items())},
+        "utilizacao_por_servidor": utilizacao_por_servidor,
+        "por_shard": {
+            sid: {"tarefas_processadas": m["tarefas_processadas"], "throughput": m["throughput"]}
+            for sid, m, *_ in parciais if m
+        },
+    }
+
+    # Blocos opcionais: contadores são somados e médias recalculadas com os pesos de cada shard
+    def atendidas_cache(m: Dict) -> int:
+        return m["cache"]["acertos"] + m["cache"]["coalescidas"] if "cache" in m else 0
+
+    com_cache = [m for m, _ in validas if "cache" in m]
+    if com_cache:
+        acertos = sum(m["cache"]["acertos"] for m in com_cache)
+        coalescidas = sum(m["cache"]["coalescidas"] for m in com_cache)
+        faltas = sum(m["cache"]["faltas"] for m in com_cache)
+        consultas = acertos + coalescidas + faltas
+        atendidas = acertos + coalescidas
+        executadas = sum(m["tarefas_processadas"] for m in com_cache) - atendidas
+        resposta_cache = sum(m["cache"]["tempo_medio_resposta_cache"] * atendidas_cache(m) for m in com_cache)
+        resposta_exec = sum(
+            m["cache"]["tempo_medio_resposta_executadas"] * (m["tarefas_processadas"] - atendidas_cache(m))
+            for m in com_cache
+        )
+        resposta_cache = resposta_cache / atendidas if atendidas else 0.0
+        resposta_exec = resposta_exec / executadas if executadas else 0.0
+        combinadas["cache"] = {
+            "politica_eviccao": com_cache[0]["cache"]["politica_eviccao"],
+            "acertos": acertos,
+            "coalescidas": coalescidas,
+            "faltas": faltas,
+            "taxa_acerto": round(acertos / consultas * 100 if consultas else 0.0, 1),
+            "taxa_coalescencia": round(coalescidas / consultas * 100 if consultas else 0.0, 1),
+            **{c: sum(m["cache"][c] for m in com_cache) for c in ("bytes_usados", "bytes_pico", "evicoes", "expiradas")},
+            "tempo_medio_resposta_cache": round(resposta_cache, 2),
+            "tempo_medio_resposta_executadas": round(resposta_exec, 2),
+            "reducao_latencia": round(
+                (1 - combinadas["tempo_medio_resposta"] / resposta_exec) * 100 if resposta_exec else 0.0, 1
+            ),
+        }
+
+    com_lote = [m for m, _ in validas if "lote" in m]
+    if com_lote:
+        lotes = sum(m["lote"]["lotes_executados"] for m in com_lote)
+        executadas_lote = sum(m["tarefas_processadas"] - atendidas_cache(m) for m in com_lote)
+        combinadas["lote"] = {
+            "tamanho_max": com_lote[0]["lote"]["tamanho_max"],
+            "espera_max": com_lote[0]["lote"]["espera_max"],
+            "lotes_executados": lotes,
+            "tamanho_medio": round(executadas_lote / lotes if lotes else 0.0, 2),
+        }
+
+    com_pools = [m for m, _ in validas if "pools" in m]
+    if com_pools:
+        combinadas["pools"] = {}
+        for nome in dict.fromkeys(n for m in com_pools for n in m["pools"]):
+            partes = [m["pools"][nome] for m in com_pools if nome in m["pools"]]
+            servidores_pool = sorted({sid for p in partes for sid in p["servidores"]})
+            tipos_pool = partes[0]["tipos"]
+            respostas = [r for tipo in tipos_pool for r in respostas_por_tipo.get(tipo, [])]
+            usos = [utilizacao_por_servidor[sid] for sid in servidores_pool if sid in utilizacao_por_servidor]
+            combinadas["pools"][nome] = {
+                "servidores": servidores_pool,
+                "tipos": tipos_pool,
+                "tarefas": len(respostas),
+                "utilizacao_media_cpu": round(sum(usos) / len(usos), 1) if usos else 0.0,
+                "tempo_medio_resposta": round(sum(respostas) / len(respostas), 2) if respostas else 0.0,
+                "tempo_resposta_p95": round(percentil(respostas, 95), 2),
+                "transbordadas": sum(p["transbordadas"] for p in partes),
+            }
+
+    com_clientes = [(m, rc) for _, m, _, rc in parciais if m and "latencia_por_cliente" in m]
+    if com_clientes:
+        respostas_por_cliente = {}
+        pesos = {}
+        for m, rc in com_clientes:
+            for cliente, valores in rc.items():
+                respostas_por_cliente.setdefault(cliente, []).extend(valores)
+            pesos.update({c: v["peso"] for c, v in m["latencia_por_cliente"].items()})
+        combinadas["fila_justa"] = com_clientes[0][0]["fila_justa"]
+        combinadas["latencia_por_cliente"] = {
+            cliente: {
+                "peso": pesos.get(cliente, 1.0),
+                **resumo_latencias(v),
+                "throughput": round(len(v) / tempo_total, 2),
+            }
+            for cliente, v in sorted(respostas_por_cliente.items())
+        }
+
+    com_custo = [m["custo"] for m, _ in validas if "custo" in m]
+    if com_custo:
+        # Os shards rodam ao mesmo tempo: os servidores em uso (e os picos) se somam
+        servidor_segundos = sum(c["servidor_segundos"] for c in com_custo)
+        combinadas["custo"] = {
+            "servidor_segundos": round(servidor_segundos, 1),
+            "servidores_medio": round(servidor_segundos / tempo_total, 2),
+            "pico_servidores": sum(c["pico_servidores"] for c in com_custo),
+            "servidor_segundos_por_tarefa": round(servidor_segundos / total, 2),
+            "utilizacao_efetiva": round(
+                sum(c["utilizacao_efetiva"] * c["servidor_segundos"] for c in com_custo) / servidor_segundos
+                if servidor_segundos else 0.0, 1
+            ),
+        }
+
+    return combinadas
+
+
+def registrar_tarefa(escritor: Optional[EscritorColunar],
+                     execucao_id: int,
+                     task_id: int,
+                     info: Optional[Tuple[float, float, str, int, str]],
+                     servidor: int,
+                     inicio: float,
+                     fim: float,
+                     inicio_simulacao: float,
+                     despacho: float = 0.0,
+                     retirada: float = 0.0,
+                     recebido: float = 0.0):
+    """
+    Grava o ciclo de vida de uma tarefa concluída. Instantes não informados
+    (requisições atendidas sem passar por um servidor) assumem inicio/fim.
+    """
+    if escritor is None or info is None:
+        return
+    criacao, chegada, tipo, prioridade, cliente = info
+    escritor.adicionar(
+        execucao=execucao_id,
+        id=task_id,
+        tipo=tipo,
+        prioridade=prioridade,
+        cliente=cliente,
+        servidor=servidor,
+        criacao=criacao - inicio_simulacao,
+        chegada=chegada - inicio_simulacao,
+        despacho=(despacho or inicio) - inicio_simulacao,
+        retirada=(retirada or inicio) - inicio_simulacao,
+        inicio=inicio - inicio_simulacao,
+        fim=fim - inicio_simulacao,
+        recebido=(recebido or fim) - inicio_simulacao,
+    )
+
+
+@dataclass
+class Acumuladores:
+    """
+    Contadores que o orquestrador acumula ao longo da execução. Ficam em um único
+    objeto para que o snapshot de checkpoint os grave e restaure de uma vez: um
+    contador novo entra aqui e passa a fazer parte do checkpoint automaticamente.
+    """
+    tasks_finalizadas: int = 0
+    tempo_espera_total: float = 0.0
+    tempo_execucao_total: float = 0.0
+    tempo_resposta_total: float = 0.0
+    tempo_espera_max: float = 0.0
+    tarefas_reenviadas: int = 0
+    servidores_falhos: int = 0
+    acertos_cache: int = 0
+    coalescidas: int = 0
+    faltas_cache: int = 0
+    tempo_resposta_cache_total: float = 0.0
+    tempo_resposta_exec_total: float = 0.0
+    lotes_executados: int = 0
+    preempcoes: int = 0
+    requisicoes_repassadas: int = 0
+    contador_ciclos: int = 0
+    servidor_segundos: float = 0.0
+    instante_primeiro_despacho: Optional[float] = None
+    tempo_execucao_por_servidor: Dict[int, float] = field(default_factory=dict)
+
+
+def deslocar_tarefa(task: Task, deslocamento: float) -> Task:
+    """Traz os instantes de uma Task salva em checkpoint para o relógio da execução retomada."""
+    task.criacao += deslocamento
+    for campo in ("despacho", "retirada", "inicio_execucao"):
+        if getattr(task, campo):
+            setattr(task, campo, getattr(task, campo) + deslocamento)
+    return task
+
+
 def salvar_metricas(metricas: Dict, arquivo: str = "metricas.json"):
     with open(arquivo, "w", encoding="utf-8") as f:
         json.dump(metricas, f, indent=2, ensure_ascii=False)
@@ -371,29 +1761,81 @@ def orquestrador(servidores: List[Servidor],
                  config_extra: Dict,
                  fila_entrada: multiprocessing.Queue,
                  tempo_simulacao: int,
-                 inicio_simulacao: float):
+                 inicio_simulacao: float,
+                 contexto_shard: Optional[Dict] = None,
+                 pool: Optional[PoolServidores] = None,
+                 retomada: Optional[Dict] = None) -> Optional[Dict]:
+    estado_salvo = retomada["estado"] if retomada else None
     servidores_ativos = [s for s in servidores if s.status == "ativo"]
+    if estado_salvo is not None:
+        # Servidores removidos por falha (ou aposentados pela autoescala) antes da interrupção continuam
+        # fora, e os criados pela autoescala voltam com o mesmo id e as mesmas especificações
+        servidores_ativos = [
+            s for s in servidores_ativos if s.id in estado_salvo["servidores_ativos"]
+        ] + estado_salvo["autoescala"]["servidores"]
 
     politica = config_extra.get("politica", "round_robin").lower()
     print(f"[{format_tempo_relativo(inicio_simulacao)}] [ORQ] Política de escalonamento ativa: {politica}\n")
 
-    result_queue = multiprocessing.Queue()
+    result_queue = multiprocessing.Queue() if pool is None else None
+    heartbeat_queue = multiprocessing.Queue() if pool is None else None
     cargas_lock = multiprocessing.Lock()
+    intervalo_heartbeat = config_extra.get("intervalo_heartbeat", 1.0)
+    falha_simulada = config_extra.get("falha_simulada")
+
+    cfg_lote = config_extra.get("lote", {})
+    config_lote = None
+    if cfg_lote.get("habilitado"):
+        config_lote = {
+            "tamanho_max": cfg_lote.get("tamanho_max", 4),
+            "espera_max": cfg_lote.get("espera_max", 0.2),
+            "expoentes": {t.tipo: t.expoente_lote for t in tipos_requisicoes},
+        }
 
-    task_queues = {}
-    workers = []
+    preemptivo = politica in POLITICAS_PREEMPTIVAS
+    quantum = config_extra.get("quantum", 0.5)
+    modo_preempcao = "srtf" if politica == "srtf" else "rr"
 
-    for s in servidores_ativos:
-        q = multiprocessing.Queue()
-        task_queues[s.id] = q
-        p = multiprocessing.Process(
-            target=worker_process,
-            args=(s.id, q, result_queue, inicio_simulacao)
-        )
-        p.start()
-        workers.append(p)
+    task_queues = {}
+    controle_queues = {}
+    workers = {}
+    aplicar_velocidade = config_extra.get("aplicar_velocidade", False)
+    inicio_preparacao = time.time()
+
+    if pool is not None:
+        task_queues, controle_queues, workers = pool.vincular(servidores_ativos, {
+            s.id: Reconfiguracao(
+                worker_id=s.id,
+                inicio_global=inicio_simulacao,
+                intervalo_heartbeat=intervalo_heartbeat,
+                falha_simulada=falha_simulada if falha_simulada and falha_simulada.get("servidor") == s.id else None,
+                config_lote=config_lote,
+                velocidade=s.velocidade if aplicar_velocidade and s.velocidade > 0 else 1.0,
+                preemptivo=preemptivo,
+                quantum=quantum,
+                modo=modo_preempcao,
+            )
+            for s in servidores_ativos
+        })
+        # vincular() pode ter recriado o pool; as filas só são lidas depois dele
+        result_queue = pool.result_queue
+        heartbeat_queue = pool.heartbeat_queue
+    else:
+        for s in servidores_ativos:
+            falha = falha_simulada if falha_simulada and falha_simulada.get("servidor") == s.id else None
+            task_queues[s.id], controle, workers[s.id] = iniciar_worker(
+                s, result_queue, heartbeat_queue, inicio_simulacao, intervalo_heartbeat, falha, config_lote,
+                s.velocidade if aplicar_velocidade and s.velocidade > 0 else 1.0,
+                preemptivo, quantum, modo_preempcao,
+            )
+            if controle is not None:
+                controle_queues[s.id] = controle
+    tempo_preparacao = time.time() - inicio_preparacao
 
-    print(f"=== BSB Compute: Simulação em Tempo Real ({tempo_simulacao}s) ===\n")
+    if contexto_shard is not None:
+        print(f"=== BSB Compute: Shard {contexto_shard['id']} ({tempo_simulacao}s) ===\n")
+    else:
+        print(f"=== BSB Compute: Simulação em Tempo Real ({tempo_simulacao}s) ===\n")
     print("Servidores ativos:")
     for s in servidores_ativos:
         print(f"  - Servidor {s.id} | cap={s.capacidade} | vel={s.velocidade}")
@@ -401,100 +1843,638 @@ def orquestrador(servidores: List[Servidor],
 
     fila_pronta = []
     cargas_servidor = {s.id: 0 for s in servidores_ativos}
-    tempo_execucao_por_servidor = {s.id: 0.0 for s in servidores_ativos}
+    contadores = Acumuladores(tempo_execucao_por_servidor={s.id: 0.0 for s in servidores_ativos})
+
+    tarefas_em_voo = {}
+    tarefas_concluidas = set()
+    execucao_atual = {}
+    inicio_no_servidor = {}
+    ultimo_heartbeat = {s.id: time.time() for s in servidores_ativos}
+
+    cfg_cache = config_extra.get("cache", {})
+    cache = None
+    if cfg_cache.get("habilitado"):
+        cache = CacheResultados(
+            capacidade_bytes=cfg_cache.get("capacidade_bytes", 256 * 1024),
+            ttl=cfg_cache.get("ttl", 30.0),
+            politica=cfg_cache.get("politica_eviccao", "lru"),
+        )
+    tamanho_por_tipo = {t.tipo: t.tamanho_resultado for t in tipos_requisicoes}
+    lider_por_chave = {}
+    aguardando_lider = {}
+    respostas_por_tipo = {}
+    suspensoes_pedidas = set()
+
+    cfg_armazem = config_extra.get("armazem", {})
+    execucao_id = config_extra.get("execucao_id", int(inicio_simulacao * 1e6))
+    pasta_armazem = cfg_armazem.get("pasta", str(PASTA_ARMAZEM))
+    escritor = None
+    if cfg_armazem.get("habilitado", True):
+        segmento = str(execucao_id) if contexto_shard is None else f"{execucao_id}-s{contexto_shard['id']}"
+        escritor = EscritorColunar(
+            os.path.join(pasta_armazem, "tarefas", segmento), COLUNAS_TAREFAS,
+            tamanho_bloco=cfg_armazem.get("tamanho_bloco", 4096),
+            retomar=estado_salvo["armazem"] if estado_salvo else None,
+        )
+    chegadas = {}
+
+    capacidade_total = sum(s.capacidade for s in servidores_ativos) or 1
+
+    cfg_perfil = config_extra.get("perfil", {})
+    arquivo_cprofile = None
+    if cfg_perfil.get("cprofile"):
+        arquivo_cprofile = cfg_perfil.get("arquivo_cprofile", os.path.join("resultados", "orquestrador.prof"))
+        if contexto_shard is not None:
+            raiz, extensao = os.path.splitext(arquivo_cprofile)
+            arquivo_cprofile = f"{raiz}-s{contexto_shard['id']}{extensao}"
+        os.makedirs(os.path.dirname(arquivo_cprofile) or ".", exist_ok=True)
+    perfil = PerfilOrquestrador(
+        habilitado=cfg_perfil.get("habilitado", False),
+        amostragem=cfg_perfil.get("amostragem", 1),
+        arquivo_cprofile=arquivo_cprofile,
+    )
+
+    cfg_pools = config_extra.get("pools", {})
+    pools = montar_pools(cfg_pools, servidores_ativos, tipos_requisicoes)
+    usar_pools = bool(pools) and cfg_pools.get("habilitado", False)
+    estado_pools = {p.nome: {"indice_rr": 0, "custo_transbordado": 0.0, "transbordadas": 0} for p in pools}
+
+    cfg_clientes = config_extra.get("clientes", {})
+    pesos_clientes = {c["nome"]: c.get("peso", 1.0) for c in cfg_clientes.get("lista", [])}
+    fila_justa = None
+    if cfg_clientes.get("habilitado") and cfg_clientes.get("fila_justa", True):
+        if usar_pools:
+            print(f"[{format_tempo_relativo(inicio_simulacao)}] [ORQ] Fila justa entre clientes ignorada: pools em dois níveis habilitados.")
+        else:
+            # Quantum padrão: o suficiente para o cliente de menor peso enviar a requisição mais cara
+            quantum_drr = cfg_clientes.get("quantum") or (
+                max((t.tempo_exec for t in tipos_requisicoes), default=1) / min(pesos_clientes.values(), default=1.0)
+            )
+            fila_justa = FilaJustaClientes(pesos_clientes, quantum_drr)
+    respostas_por_cliente = {}
+
+    cfg_checkpoint = config_extra.get("checkpoint", {})
+    checkpoint = None
+    if cfg_checkpoint.get("habilitado") and contexto_shard is None:
+        checkpoint = GerenciadorCheckpoint(
+            pasta_execucao(cfg_checkpoint.get("pasta", str(PASTA_CHECKPOINT)), execucao_id),
+            cfg_checkpoint.get("intervalo", 5.0),
+            posicao_log=retomada["posicao_log"] if retomada else None,
+            posicao_concluidas=retomada["posicao_concluidas"] if retomada else None,
+            pausa_max_ms=cfg_checkpoint.get("pausa_max_ms", 50.0),
+        )
 
-    tasks_finalizadas = 0
-    tempo_espera_total = 0.0
-    tempo_execucao_total = 0.0
-    tempo_resposta_total = 0.0
-    tempo_espera_max = 0.0
+    cfg_autoescala = config_extra.get("autoescala", {})
+    autoescala = None
+    if cfg_autoescala.get("habilitado") and contexto_shard is None:
+        if usar_pools:
+            # Os grupos de pools listam servidores fixos; um servidor novo não teria pool
+            print(f"[{format_tempo_relativo(inicio_simulacao)}] [ORQ] Autoescala ignorada: pools em dois níveis habilitados.")
+        else:
+            autoescala = ControladorAutoescala(cfg_autoescala, inicio_simulacao)
+    modelo_servidor = cfg_autoescala.get("modelo", {})
+    proximo_id_servidor = max((s.id for s in servidores), default=0) + 1
+    provisionando = {}  # id -> instante em que o servidor fica pronto
+    aposentando = {}  # id -> processo do servidor que termina as tarefas que já recebeu
+    encerrados = set()  # servidores do pool aposentados cujo FimRodada já chegou
+    aguardando_resultados = set()  # aposentados já parados com requisições cujo resultado ainda não foi lido
+    criados_autoescala = []
+    eventos_escala = []
+    instante_custo = time.time()
+    pico_servidores = len(servidores_ativos)
 
     gerador_ativo = True
     indice_rr = 0
-    contador_ciclos = 0
-
-    while (
-        (time.time() - inicio_simulacao) < tempo_simulacao
-        or gerador_ativo
-        or fila_pronta
-        or any(cargas_servidor.values())
-    ):
-        try:
-            while True:
-                nova_task = fila_entrada.get_nowait()
 
-                if nova_task is None:
-                    gerador_ativo = False
-                    print(f"[{format_tempo_relativo(inicio_simulacao)}] [ORQ] Recebeu sinal de término do gerador.")
-                    break
-                else:
-                    ts = format_tempo_relativo(inicio_simulacao)
-                    print(
-                        f"[{ts}] [ORQ] Requisição {nova_task.id} "
-                        f"({prioridade_str(nova_task.prioridade)}) chegou ao orquestrador "
-                        f"(Tipo: {nova_task.tipo}, Custo: {nova_task.custo_estimado}s)"
-                    )
-                    fila_pronta.append(nova_task)
-        except queue.Empty:
-            pass
+    if estado_salvo is not None:
+        deslocamento = retomada["deslocamento"]
+        # As requisições em voo se perderam com os servidores da execução
+        # interrompida: voltam para a fila e são executadas (e contadas) uma vez só
+        # As concluídas e as amostras de latência vêm do log de conclusões, não do snapshot
+        for task_id, tipo, cliente, resposta in retomada["concluidas"]:
+            tarefas_concluidas.add(task_id)
+            respostas_por_tipo.setdefault(tipo, []).append(resposta)
+            respostas_por_cliente.setdefault(cliente, []).append(resposta)
+        em_voo = [t for _, t in estado_salvo["tarefas_em_voo"].values() if t.id not in tarefas_concluidas]
+        fila_pronta = [
+            deslocar_tarefa(t, deslocamento) for t in estado_salvo["fila_pronta"] + em_voo
+            if t.id not in tarefas_concluidas
+        ]
+        chegadas = {
+            tid: (criacao + deslocamento, chegada + deslocamento, *resto)
+            for tid, (criacao, chegada, *resto) in estado_salvo["chegadas"].items()
+        }
+        estado_pools.update(estado_salvo["estado_pools"])
+        lider_por_chave = estado_salvo["lider_por_chave"]
+        aguardando_lider = estado_salvo["aguardando_lider"]
+        for _, seguidores in aguardando_lider.values():
+            for seguidor in seguidores:
+                deslocar_tarefa(seguidor, deslocamento)
+        if cache is not None and estado_salvo["cache"] is not None:
+            cache = estado_salvo["cache"]
+            for entrada in cache.entradas.values():
+                entrada[1] += deslocamento
+
+        # Os acumuladores voltam como um único objeto, exatamente como foram gravados
+        contadores = estado_salvo["contadores"]
+        if contadores.instante_primeiro_despacho is not None:
+            contadores.instante_primeiro_despacho += deslocamento
+        salvo_escala = estado_salvo["autoescala"]
+        proximo_id_servidor = salvo_escala["proximo_id_servidor"]
+        criados_autoescala = salvo_escala["criados"]
+        eventos_escala = salvo_escala["eventos"]
+        pico_servidores = salvo_escala["pico_servidores"]
+        provisionando = {sid: pronto_em + deslocamento for sid, pronto_em in salvo_escala["provisionando"].items()}
 
-        try:
-            while True:
-                resultado = result_queue.get_nowait()
+        print(
+            f"[{format_tempo_relativo(inicio_simulacao)}] [ORQ] Retomando do checkpoint: "
+            f"{contadores.tasks_finalizadas} tarefas já concluídas, {len(fila_pronta)} de volta à fila, "
+            f"{len(retomada['chegadas'])} chegadas reenviadas do log."
+        )
+        if fila_justa is not None:
+            for tarefa in fila_pronta:
+                fila_justa.adicionar(tarefa)
+
+    perfil.iniciar()
+    try:
+        while (
+            (time.time() - inicio_simulacao) < tempo_simulacao
+            or gerador_ativo
+            or fila_pronta
+            or any(cargas_servidor.values())
+            or aposentando
+            or (contexto_shard is not None and not finalizar_shard(contexto_shard))
+        ):
+            perfil.iniciar_ciclo()
+            try:
+                while True:
+                    nova_task = fila_entrada.get_nowait()
+                    perfil.contar("chegadas")
+
+                    if nova_task is None:
+                        gerador_ativo = False
+                        print(f"[{format_tempo_relativo(inicio_simulacao)}] [ORQ] Recebeu sinal de término do gerador.")
+                        break
+                    else:
+                        if nova_task.doada:
+                            nova_task.doada = False
+                            with contexto_shard["doacoes"].get_lock():
+                                contexto_shard["doacoes"].value -= 1
+                        if checkpoint is not None:
+                            checkpoint.registrar_chegada(nova_task)
+
+                        chegadas[nova_task.id] = (
+                            nova_task.criacao, time.time(), nova_task.tipo, nova_task.prioridade, nova_task.cliente
+                        )
+
+                        ts = format_tempo_relativo(inicio_simulacao)
+                        print(
+                            f"[{ts}] [ORQ] Requisição {nova_task.id} "
+                            f"({prioridade_str(nova_task.prioridade)}) chegou ao orquestrador "
+                            f"(Tipo: {nova_task.tipo}, Custo: {nova_task.custo_estimado}s)"
+                        )
+
+                        if cache is not None and nova_task.chave:
+                            if cache.obter(nova_task.chave):
+                                resposta = time.time() - nova_task.criacao
+                                contadores.acertos_cache += 1
+                                contadores.tasks_finalizadas += 1
+                                contadores.tempo_espera_total += resposta
+                                contadores.tempo_resposta_total += resposta
+                                contadores.tempo_resposta_cache_total += resposta
+                                contadores.tempo_espera_max = max(contadores.tempo_espera_max, resposta)
+                                respostas_por_tipo.setdefault(nova_task.tipo, []).append(resposta)
+                                respostas_por_cliente.setdefault(nova_task.cliente, []).append(resposta)
+                                if checkpoint is not None:
+                                    checkpoint.registrar_conclusao(nova_task.id, nova_task.tipo, nova_task.cliente, resposta)
+                                agora = time.time()
+                                registrar_tarefa(escritor, execucao_id, nova_task.id, chegadas.pop(nova_task.id),
+                                                 -1, agora, agora, inicio_simulacao)
+                                print(f"[{ts}] [CACHE] Requisição {nova_task.id} atendida pelo cache ({nova_task.chave}).")
+                                continue
+
+                            if nova_task.chave in lider_por_chave:
+                                lider = lider_por_chave[nova_task.chave]
+                                aguardando_lider[lider][1].append(nova_task)
+                                contadores.coalescidas += 1
+                                print(
+                                    f"[{ts}] [CACHE] Requisição {nova_task.id} aguardando execução "
+                                    f"idêntica da Requisição {lider} ({nova_task.chave})."
+                                )
+                                continue
+
+                            contadores.faltas_cache += 1
+                            lider_por_chave[nova_task.chave] = nova_task.id
+                            aguardando_lider[nova_task.id] = (nova_task.chave, [])
+
+                        fila_pronta.append(nova_task)
+                        if fila_justa is not None:
+                            fila_justa.adicionar(nova_task)
+            except queue.Empty:
+                pass
+
+            perfil.marcar("entrada")
 
-                tasks_finalizadas += 1
-                tempo_espera_total += resultado.tempo_espera
-                tempo_execucao_total += resultado.tempo_execucao
-                tempo_resposta_total += resultado.tempo_espera + resultado.tempo_execucao
+            try:
+                while True:
+                    resultado = result_queue.get_nowait()
+                    perfil.contar("resultados")
 
-                if resultado.tempo_espera > tempo_espera_max:
-                    tempo_espera_max = resultado.tempo_espera
+                    if isinstance(resultado, FimRodada):
+                        # servidor do pool aposentado pela autoescala terminou as suas tarefas
+                        encerrados.add(resultado.worker_id)
+                        continue
 
-                if resultado.worker_id in tempo_execucao_por_servidor:
-                    tempo_execucao_por_servidor[resultado.worker_id] += resultado.tempo_execucao
-                    
                     with cargas_lock:
-                        if cargas_servidor[resultado.worker_id] > 0:
+                        if cargas_servidor.get(resultado.worker_id, 0) > 0:
                             cargas_servidor[resultado.worker_id] -= 1
 
-                ts = format_tempo_relativo(inicio_simulacao)
-                print(
-                    f"[{ts}] [SRV-{resultado.worker_id}] Concluiu Requisição {resultado.task_id} "
-                    f"(espera={resultado.tempo_espera:.2f}s, exec={resultado.tempo_execucao:.2f}s)"
-                )
-        except queue.Empty:
-            pass
+                    if isinstance(resultado, Suspensao):
+                        tarefa = resultado.task
+                        suspensoes_pedidas.discard(tarefa.id)
+                        if resultado.worker_id in contadores.tempo_execucao_por_servidor:
+                            contadores.tempo_execucao_por_servidor[resultado.worker_id] += resultado.tempo_servidor
+                        inicio_no_servidor.pop(tarefa.id, None)
+                        if tarefa.id in tarefas_concluidas:
+                            continue
+                        if tarefas_em_voo.get(tarefa.id, (None,))[0] != resultado.worker_id:
+                            # a verificação de saúde já devolveu ou reenviou a requisição; esta cópia é descartada
+                            continue
+                        del tarefas_em_voo[tarefa.id]
+                        contadores.preempcoes += 1
+                        fila_pronta.append(tarefa)
+                        if fila_justa is not None:
+                            fila_justa.adicionar(tarefa)
+                        continue
+
+                    suspensoes_pedidas.discard(resultado.task_id)
+
+                    if resultado.task_id in tarefas_concluidas:
+                        ts = format_tempo_relativo(inicio_simulacao)
+                        print(
+                            f"[{ts}] [HB] Resultado tardio da Requisição {resultado.task_id} "
+                            f"no Servidor {resultado.worker_id} descartado."
+                        )
+                        continue
+
+                    tarefas_concluidas.add(resultado.task_id)
+                    tarefas_em_voo.pop(resultado.task_id, None)
+                    inicio_no_servidor.pop(resultado.task_id, None)
+                    # Uma cópia reenviada que ainda esteja na fila_pronta é descartada no despacho
+                    if fila_justa is not None:
+                        fila_justa.remover([resultado.task_id])
+
+                    contadores.tasks_finalizadas += 1
+                    contadores.tempo_espera_total += resultado.tempo_espera
+                    contadores.tempo_execucao_total += resultado.tempo_execucao
+                    contadores.tempo_resposta_total += resultado.tempo_espera + resultado.tempo_execucao
+
+                    if resultado.tempo_espera > contadores.tempo_espera_max:
+                        contadores.tempo_espera_max = resultado.tempo_espera
+
+                    contadores.tempo_resposta_exec_total += resultado.tempo_espera + resultado.tempo_execucao
+
+                    if resultado.abre_lote:
+                        contadores.lotes_executados += 1
+                    if autoescala is not None:
+                        autoescala.observar_espera(time.time(), resultado.tempo_espera)
+                    resposta = resultado.tempo_espera + resultado.tempo_execucao
+                    respostas_por_tipo.setdefault(resultado.tipo, []).append(resposta)
+                    respostas_por_cliente.setdefault(resultado.cliente, []).append(resposta)
+                    if checkpoint is not None:
+                        checkpoint.registrar_conclusao(resultado.task_id, resultado.tipo, resultado.cliente, resposta)
+                    registrar_tarefa(escritor, execucao_id, resultado.task_id, chegadas.pop(resultado.task_id, None),
+                                     resultado.worker_id, resultado.inicio, resultado.fim, inicio_simulacao,
+                                     despacho=resultado.despacho, retirada=resultado.retirada, recebido=time.time())
+
+                    if resultado.worker_id in contadores.tempo_execucao_por_servidor:
+                        if resultado.tempo_servidor >= 0:
+                            contadores.tempo_execucao_por_servidor[resultado.worker_id] += resultado.tempo_servidor
+                        else:
+                            contadores.tempo_execucao_por_servidor[resultado.worker_id] += resultado.tempo_execucao / resultado.tamanho_lote
+
+                    if resultado.task_id in aguardando_lider:
+                        chave, seguidores = aguardando_lider.pop(resultado.task_id)
+                        del lider_por_chave[chave]
+                        cache.inserir(chave, tamanho_por_tipo.get(chave.split(":")[0], 4096))
+
+                        agora = time.time()
+                        for seguidor in seguidores:
+                            resposta = agora - seguidor.criacao
+                            contadores.tasks_finalizadas += 1
+                            contadores.tempo_espera_total += resposta
+                            contadores.tempo_resposta_total += resposta
+                            contadores.tempo_resposta_cache_total += resposta
+                            contadores.tempo_espera_max = max(contadores.tempo_espera_max, resposta)
+                            respostas_por_tipo.setdefault(seguidor.tipo, []).append(resposta)
+                            respostas_por_cliente.setdefault(seguidor.cliente, []).append(resposta)
+                            if checkpoint is not None:
+                                checkpoint.registrar_conclusao(seguidor.id, seguidor.tipo, seguidor.cliente, resposta)
+                            registrar_tarefa(escritor, execucao_id, seguidor.id, chegadas.pop(seguidor.id, None),
+                                             -1, agora, agora, inicio_simulacao)
 
-        indice_rr, cargas_servidor = despachar_tarefas(
-            fila_pronta=fila_pronta,
-            politica=politica,
-            task_queues=task_queues,
-            servidores_ativos=servidores_ativos,
-            cargas_servidor=cargas_servidor,
-            indice_rr=indice_rr,
-            inicio_simulacao=inicio_simulacao,
-            cargas_lock=cargas_lock,
-        )
+                    ts = format_tempo_relativo(inicio_simulacao)
+                    print(
+                        f"[{ts}] [SRV-{resultado.worker_id}] Concluiu Requisição {resultado.task_id} "
+                        f"(espera={resultado.tempo_espera:.2f}s, exec={resultado.tempo_execucao:.2f}s)"
+                    )
+            except queue.Empty:
+                pass
 
-        contador_ciclos += 1
-        if contador_ciclos % 5 == 0:
-            cargas_servidor = migrar_tarefas_dinamicas(
-                task_queues=task_queues,
-                cargas_servidor=cargas_servidor,
+            perfil.marcar("resultados")
+
+            try:
+                while True:
+                    hb = heartbeat_queue.get_nowait()
+                    perfil.contar("heartbeats")
+                    if hb.instante < inicio_simulacao:
+                        # heartbeat atrasado de uma rodada anterior do pool
+                        continue
+                    ultimo_heartbeat[hb.worker_id] = max(ultimo_heartbeat.get(hb.worker_id, 0.0), hb.instante)
+                    if hb.task_id is not None:
+                        execucao_atual[hb.worker_id] = (hb.task_id, hb.inicio_tarefa, hb.duracao_prevista)
+                        if preemptivo and inicio_no_servidor.get(hb.task_id, (None,))[0] != hb.worker_id:
+                            inicio_no_servidor[hb.task_id] = (hb.worker_id, hb.inicio_tarefa)
+                    else:
+                        execucao_atual.pop(hb.worker_id, None)
+            except queue.Empty:
+                pass
+
+            perfil.marcar("heartbeats")
+
+            reenviadas, falhos = verificar_saude_servidores(
                 servidores_ativos=servidores_ativos,
+                processos=workers,
+                cargas_servidor=cargas_servidor,
+                tarefas_em_voo=tarefas_em_voo,
+                execucao_atual=execucao_atual,
+                ultimo_heartbeat=ultimo_heartbeat,
+                fila_pronta=fila_pronta,
+                config_extra=config_extra,
                 inicio_simulacao=inicio_simulacao,
                 cargas_lock=cargas_lock,
+                fila_justa=fila_justa,
             )
+            contadores.tarefas_reenviadas += reenviadas
+            contadores.servidores_falhos += falhos
+
+            if not servidores_ativos:
+                print(f"[{format_tempo_relativo(inicio_simulacao)}] [ORQ] Nenhum servidor disponível. Abortando simulação.")
+                break
+            indice_rr %= len(servidores_ativos)
+            perfil.marcar("saude")
+
+            pendentes = len(fila_pronta)
+            if usar_pools:
+                cargas_servidor = despachar_com_pools(
+                    fila_pronta=fila_pronta,
+                    pools=pools,
+                    estado_pools=estado_pools,
+                    transbordo=cfg_pools.get("transbordo", True),
+                    politica=politica,
+                    task_queues=task_queues,
+                    servidores_ativos=servidores_ativos,
+                    cargas_servidor=cargas_servidor,
+                    inicio_simulacao=inicio_simulacao,
+                    cargas_lock=cargas_lock,
+                    tarefas_em_voo=tarefas_em_voo,
+                    afinidade_tipo=config_lote is not None,
+                    concluidas=tarefas_concluidas,
+                )
+            elif fila_justa is not None:
+                indice_rr, cargas_servidor = despachar_com_clientes(
+                    fila_pronta=fila_pronta,
+                    fila_justa=fila_justa,
+                    politica=politica,
+                    task_queues=task_queues,
+                    servidores_ativos=servidores_ativos,
+                    cargas_servidor=cargas_servidor,
+                    indice_rr=indice_rr,
+                    inicio_simulacao=inicio_simulacao,
+                    cargas_lock=cargas_lock,
+                    tarefas_em_voo=tarefas_em_voo,
+                    afinidade_tipo=config_lote is not None,
+                )
+            else:
+                indice_rr, cargas_servidor = despachar_tarefas(
+                    fila_pronta=fila_pronta,
+                    politica=politica,
+                    task_queues=task_queues,
+                    servidores_ativos=servidores_ativos,
+                    cargas_servidor=cargas_servidor,
+                    indice_rr=indice_rr,
+                    inicio_simulacao=inicio_simulacao,
+                    cargas_lock=cargas_lock,
+                    tarefas_em_voo=tarefas_em_voo,
+                    afinidade_tipo=config_lote is not None,
+                    concluidas=tarefas_concluidas,
+                )
+            if contadores.instante_primeiro_despacho is None and len(fila_pronta) < pendentes:
+                contadores.instante_primeiro_despacho = time.time()
+            perfil.contar("despachadas", pendentes - len(fila_pronta))
+            perfil.marcar("despacho")
+
+            if preemptivo:
+                for sid, tid in selecionar_preempcoes(politica, fila_pronta, tarefas_em_voo, execucao_atual,
+                                                      suspensoes_pedidas, inicio_no_servidor, quantum):
+                    if sid in controle_queues:
+                        controle_queues[sid].put(tid)
+                        suspensoes_pedidas.add(tid)
+            perfil.marcar("preempcao")
+
+            contadores.contador_ciclos += 1
+
+            if contexto_shard is not None:
+                contexto_shard["cargas"][contexto_shard["id"]] = (
+                    len(fila_pronta) + sum(cargas_servidor.values())
+                ) / capacidade_total
+                if gerador_ativo and contadores.contador_ciclos % 5 == 0:
+                    contadores.requisicoes_repassadas += rebalancear_shards(
+                        fila_pronta, contexto_shard, aguardando_lider, inicio_simulacao, fila_justa,
+                        tarefas_concluidas,
+                    )
+            perfil.marcar("rebalanceamento")
+
+            if contadores.contador_ciclos % 5 == 0:
+                cargas_servidor = migrar_tarefas_dinamicas(
+                    task_queues=task_queues,
+                    cargas_servidor=cargas_servidor,
+                    servidores_ativos=servidores_ativos,
+                    inicio_simulacao=inicio_simulacao,
+                    cargas_lock=cargas_lock,
+                    tarefas_em_voo=tarefas_em_voo,
+                    pools=pools if usar_pools else None,
+                )
+            perfil.contar("fila_pronta", len(fila_pronta))
+            perfil.marcar("migracao")
+
+            # Custo em servidor-segundos: servidores ativos, em provisionamento e aposentando
+            agora = time.time()
+            em_uso = len(servidores_ativos) + len(provisionando) + len(aposentando)
+            contadores.servidor_segundos += em_uso * (agora - instante_custo)
+            instante_custo = agora
+            pico_servidores = max(pico_servidores, em_uso)
+
+            if autoescala is not None:
+                for sid in [sid for sid, pronto_em in provisionando.items() if agora >= pronto_em]:
+                    del provisionando[sid]
+                    novo = Servidor(
+                        id=sid,
+                        capacidade=modelo_servidor.get("capacidade", 2),
+                        status="ativo",
+                        velocidade=modelo_servidor.get("velocidade", 1.0),
+                    )
+                    task_queues[sid], controle, workers[sid] = iniciar_worker(
+                        novo, result_queue, heartbeat_queue, inicio_simulacao, intervalo_heartbeat, None, config_lote,
+                        novo.velocidade if aplicar_velocidade and novo.velocidade > 0 else 1.0,
+                        preemptivo, quantum, modo_preempcao,
+                    )
+                    if controle is not None:
+                        controle_queues[sid] = controle
+                    with cargas_lock:
+                        cargas_servidor[sid] = 0
+                    contadores.tempo_execucao_por_servidor[sid] = 0.0
+                    ultimo_heartbeat[sid] = agora
+                    servidores_ativos.append(novo)
+                    criados_autoescala.append(sid)
+                    print(f"[{format_tempo_relativo(inicio_simulacao)}] [ESCALA] Servidor {sid} provisionado (cap={novo.capacidade}).")
+
+                for sid in list(aposentando):
+                    # O servidor só é desligado depois que todas as requisições que ele recebeu voltaram
+                    pendentes = [tid for tid, (sid_tarefa, _) in tarefas_em_voo.items() if sid_tarefa == sid]
+                    parado = sid in encerrados or not aposentando[sid].is_alive()
+                    sem_sinal = agora - ultimo_heartbeat.get(sid, agora) > config_extra.get("timeout_heartbeat", 5.0)
+                    ts = format_tempo_relativo(inicio_simulacao)
+                    if parado and not pendentes:
+                        del aposentando[sid]
+                        aguardando_resultados.discard(sid)
+                        print(f"[{ts}] [ESCALA] Servidor {sid} desligado.")
+                    elif sem_sinal or (parado and sid in aguardando_resultados):
+                        # Caiu ou travou antes de concluir: como em verificar_saude_servidores,
+                        # as requisições que estavam com ele voltam para a fila
+                        print(f"[{ts}] [ESCALA] Servidor {sid} falhou durante a aposentadoria. Removendo.")
+                        aposentando.pop(sid).terminate()
+                        aguardando_resultados.discard(sid)
+                        execucao_atual.pop(sid, None)
+                        contadores.servidores_falhos += 1
+                        for tid in pendentes:
+                            _, tarefa = tarefas_em_voo.pop(tid)
+                            fila_pronta.insert(0, tarefa)
+                            if fila_justa is not None:
+                                fila_justa.adicionar(tarefa, na_frente=True)
+                            contadores.tarefas_reenviadas += 1
+                            print(f"[{ts}] [HB] Requisição {tid} reenviada (servidor {sid} falhou).")
+                    elif parado:
+                        # Os últimos resultados podem ainda estar na result_queue; espera mais um ciclo
+                        aguardando_resultados.add(sid)
+
+                capacidade = sum(s.capacidade for s in servidores_ativos) or 1
+                autoescala.observar(
+                    agora,
+                    len(fila_pronta) / capacidade,
+                    sum(cargas_servidor.get(s.id, 0) for s in servidores_ativos) / capacidade,
+                )
+                acao, motivo = autoescala.decidir(agora, len(servidores_ativos) + len(provisionando))
+                # O servidor com falha simulada nunca é aposentado, para a falha continuar sendo exercitada
+                candidatos = [
+                    s for s in servidores_ativos
+                    if not (falha_simulada and falha_simulada.get("servidor") == s.id)
+                ]
+                if acao < 0 and not provisionando and not candidatos:
+                    acao = 0
+                if acao > 0:
+                    sid = proximo_id_servidor
+                    proximo_id_servidor += 1
+                    provisionando[sid] = agora + cfg_autoescala.get("atraso_provisionamento", 2.0)
+                    print(f"[{format_tempo_relativo(inicio_simulacao)}] [ESCALA] Provisionando Servidor {sid} ({motivo}).")
+                elif acao < 0 and provisionando:
+                    sid = max(provisionando)
+                    del provisionando[sid]
+                    print(f"[{format_tempo_relativo(inicio_simulacao)}] [ESCALA] Provisionamento do Servidor {sid} cancelado ({motivo}).")
+                elif acao < 0:
+                    # Sai o servidor menos carregado (entre os empatados, o mais novo); ele para de
+                    # receber requisições e é desligado depois de concluir as que já estão com ele
+                    alvo = min(candidatos, key=lambda s: (cargas_servidor.get(s.id, 0), -s.id))
+                    sid = alvo.id
+                    servidores_ativos.remove(alvo)
+                    with cargas_lock:
+                        cargas_servidor.pop(sid, None)
+                    task_queues[sid].put(None)
+                    aposentando[sid] = workers[sid]
+                    print(f"[{format_tempo_relativo(inicio_simulacao)}] [ESCALA] Aposentando Servidor {sid} ({motivo}).")
+                if acao:
+                    eventos_escala.append({
+                        "instante": round(agora - inicio_simulacao, 2),
+                        "acao": "provisionar" if acao > 0 else "aposentar",
+                        "servidor": sid,
+                        "motivo": motivo,
+                        "servidores": len(servidores_ativos) + len(provisionando),
+                    })
+            perfil.marcar("autoescala")
+
+            if checkpoint is not None:
+                checkpoint.descarregar()
+                if checkpoint.vencido():
+                    pausa = checkpoint.salvar({
+                        "execucao_id": execucao_id,
+                        "inicio_simulacao": inicio_simulacao,
+                        "servidores_ativos": [s.id for s in servidores_ativos],
+                        "armazem": escritor.marcar_checkpoint() if escritor is not None else None,
+                        "fila_pronta": fila_pronta,
+                        "tarefas_em_voo": tarefas_em_voo,
+                        "chegadas": chegadas,
+                        "estado_pools": estado_pools,
+                        "lider_por_chave": lider_por_chave,
+                        "aguardando_lider": aguardando_lider,
+                        "cache": cache,
+                        "autoescala": {
+                            "proximo_id_servidor": proximo_id_servidor,
+                            "servidores": [s for s in servidores_ativos if s.id in criados_autoescala],
+                            "criados": criados_autoescala,
+                            "provisionando": provisionando,
+                            "eventos": eventos_escala,
+                            "pico_servidores": pico_servidores,
+                        },
+                        "contadores": contadores,
+                    })
+                    ts = format_tempo_relativo(inicio_simulacao)
+                    print(
+                        f"[{ts}] [CKP] Snapshot {checkpoint.snapshots}: pausa {pausa:.2f} ms, "
+                        f"{checkpoint.bytes_snapshot / 1024:.1f} KB"
+                        + (f" (acima de {checkpoint.pausa_max_ms:g} ms; próximo em {checkpoint.intervalo_efetivo:.1f}s)"
+                           if pausa > checkpoint.pausa_max_ms else "")
+                    )
+            perfil.marcar("checkpoint")
 
-        time.sleep(0.1)
+            time.sleep(config_extra.get("intervalo_ciclo", 0.1))
+            perfil.marcar("espera")
+    finally:
+        # Restaura o stdout mesmo se o laço falhar (o launcher e o comparador rodam várias simulações no mesmo processo)
+        perfil.finalizar()
 
+    if checkpoint is not None:
+        checkpoint.finalizar(concluida=True)
     print(f"\n[{format_tempo_relativo(inicio_simulacao)}] [ORQ] Tempo esgotado. Encerrando sistema...")
 
-    for sid, q in task_queues.items():
-        q.put(None)
-
-    for p in workers:
-        p.join()
+    inicio_encerramento = time.time()
+    for s in servidores_ativos:
+        task_queues[s.id].put(None)
+
+    if pool is not None:
+        ids_pool = [s.id for s in servidores_ativos if s.id in pool.vinculados]
+        if not pool.liberar(ids_pool, config_extra.get("timeout_heartbeat", 5.0)):
+            print(f"[{format_tempo_relativo(inicio_simulacao)}] [ORQ] Pool de servidores será recriado na próxima rodada.")
+        # Servidores criados pela autoescala não fazem parte do pool (exceto os recriados na retomada)
+        processos_proprios = {sid: workers[sid] for sid in criados_autoescala if sid in workers and sid not in pool.vinculados}
+    else:
+        processos_proprios = workers
+    for sid, p in processos_proprios.items():
+        p.join(timeout=config_extra.get("timeout_heartbeat", 5.0))
+        if p.is_alive():
+            print(f"[{format_tempo_relativo(inicio_simulacao)}] [ORQ] Servidor {sid} não encerrou. Forçando término.")
+            p.terminate()
+            p.join()
+    tempo_encerramento = time.time() - inicio_encerramento
 
     tempo_total_simulacao = time.time() - inicio_simulacao
 
@@ -502,64 +2482,411 @@ def orquestrador(servidores: List[Servidor],
     print("                === Relatório Final ===")
     print("-" * 60)
 
-    if tasks_finalizadas > 0:
-        tempo_medio_espera = tempo_espera_total / tasks_finalizadas
-        tempo_medio_execucao = tempo_execucao_total / tasks_finalizadas
-        tempo_medio_resposta = tempo_resposta_total / tasks_finalizadas
-        throughput = tasks_finalizadas / tempo_total_simulacao
+    if contadores.tasks_finalizadas > 0:
+        tempo_medio_espera = contadores.tempo_espera_total / contadores.tasks_finalizadas
+        tempo_medio_execucao = contadores.tempo_execucao_total / contadores.tasks_finalizadas
+        tempo_medio_resposta = contadores.tempo_resposta_total / contadores.tasks_finalizadas
+        throughput = contadores.tasks_finalizadas / tempo_total_simulacao
 
         utilizacoes = {
             sid: min(1.0, t_exec / tempo_total_simulacao)
-            for sid, t_exec in tempo_execucao_por_servidor.items()
+            for sid, t_exec in contadores.tempo_execucao_por_servidor.items()
         }
         utilizacao_media = (
             sum(utilizacoes.values()) / len(utilizacoes) if utilizacoes else 0.0
         )
 
-        print(f"Total de tarefas processadas     : {tasks_finalizadas}")
+        print(f"Total de tarefas processadas     : {contadores.tasks_finalizadas}")
         print(f"Tempo total de simulação         : {tempo_total_simulacao:.2f}s")
         print(f"Tempo médio de espera na fila    : {tempo_medio_espera:.2f}s")
-        print(f"Tempo máximo de espera na fila   : {tempo_espera_max:.2f}s")
+        print(f"Tempo máximo de espera na fila   : {contadores.tempo_espera_max:.2f}s")
         print(f"Tempo médio de execução na CPU   : {tempo_medio_execucao:.2f}s")
         print(f"Tempo médio de resposta          : {tempo_medio_resposta:.2f}s")
         print(f"Throughput                       : {throughput:.2f} tarefas/segundo")
+        print(f"Tarefas reenviadas (timeout/falha): {contadores.tarefas_reenviadas}")
+        print(f"Servidores removidos por falha   : {contadores.servidores_falhos}")
+
+        if preemptivo:
+            print(f"Preempções (quantum={quantum}s)   : {contadores.preempcoes}")
+        if checkpoint is not None:
+            resumo_checkpoint = checkpoint.resumo()
+            print(
+                f"Snapshots de checkpoint          : {resumo_checkpoint['snapshots']} "
+                f"(pausa média {resumo_checkpoint['pausa_media_ms']:.2f} ms, máx. {resumo_checkpoint['pausa_max_ms']:.2f} ms, "
+                f"{resumo_checkpoint['acima_limite']} acima de {resumo_checkpoint['pausa_limite_ms']:g} ms)"
+            )
+
+        print()
+        print("Latência de resposta por tipo (média / p50 / p95 / p99):")
+        latencia_por_tipo = {}
+        todas_respostas = [r for respostas in respostas_por_tipo.values() for r in respostas]
+        for tipo, respostas in sorted(respostas_por_tipo.items()):
+            latencia_por_tipo[tipo] = resumo_latencias(respostas)
+            lat = latencia_por_tipo[tipo]
+            print(f"  - {tipo:<8}: {lat['media']:.2f}s / {lat['p50']:.2f}s / {lat['p95']:.2f}s / {lat['p99']:.2f}s")
+
+        metricas_lote = None
+        if config_lote is not None:
+            executadas_lote = contadores.tasks_finalizadas - contadores.acertos_cache - contadores.coalescidas
+            tamanho_medio = executadas_lote / contadores.lotes_executados if contadores.lotes_executados else 0.0
+            print(f"Lotes executados                 : {contadores.lotes_executados}")
+            print(f"Tamanho médio do lote            : {tamanho_medio:.2f}")
+            metricas_lote = {
+                "tamanho_max": config_lote["tamanho_max"],
+                "espera_max": config_lote["espera_max"],
+                "lotes_executados": contadores.lotes_executados,
+                "tamanho_medio": round(tamanho_medio, 2),
+            }
+
+        metricas_cache = None
+        if cache is not None:
+            atendidas_cache = contadores.acertos_cache + contadores.coalescidas
+            executadas = contadores.tasks_finalizadas - atendidas_cache
+            consultas = contadores.acertos_cache + contadores.coalescidas + contadores.faltas_cache
+            # Coalescidas não acharam o resultado no cache: entram só na taxa de coalescência
+            taxa_acerto = contadores.acertos_cache / consultas if consultas else 0.0
+            taxa_coalescencia = contadores.coalescidas / consultas if consultas else 0.0
+            resposta_cache = contadores.tempo_resposta_cache_total / atendidas_cache if atendidas_cache else 0.0
+            resposta_exec = contadores.tempo_resposta_exec_total / executadas if executadas else 0.0
+            reducao = 1 - tempo_medio_resposta / resposta_exec if resposta_exec else 0.0
+
+            print()
+            print(f"Cache ({cache.politica}, ttl={cache.ttl}s):")
+            print(
+                f"  - Acertos / coalescidas / faltas : "
+                f"{contadores.acertos_cache} / {contadores.coalescidas} / {contadores.faltas_cache}"
+            )
+            print(f"  - Taxa de acerto / coalescência  : {taxa_acerto*100:.1f}% / {taxa_coalescencia*100:.1f}%")
+            print(f"  - Bytes em uso (pico)            : {cache.bytes_usados} ({cache.bytes_pico}) de {cache.capacidade_bytes}")
+            print(f"  - Evicções / expiradas           : {cache.evicoes} / {cache.expiradas}")
+            print(f"  - Resposta média cache vs exec.  : {resposta_cache:.2f}s vs {resposta_exec:.2f}s")
+            print(f"  - Redução da latência média      : {reducao*100:.1f}%")
+
+            metricas_cache = {
+                "politica_eviccao": cache.politica,
+                "acertos": contadores.acertos_cache,
+                "coalescidas": contadores.coalescidas,
+                "faltas": contadores.faltas_cache,
+                "taxa_acerto": round(taxa_acerto * 100, 1),
+                "taxa_coalescencia": round(taxa_coalescencia * 100, 1),
+                "bytes_usados": cache.bytes_usados,
+                "bytes_pico": cache.bytes_pico,
+                "evicoes": cache.evicoes,
+                "expiradas": cache.expiradas,
+                "tempo_medio_resposta_cache": round(resposta_cache, 2),
+                "tempo_medio_resposta_executadas": round(resposta_exec, 2),
+                "reducao_latencia": round(reducao * 100, 1),
+            }
         print()
         print("Utilização aproximada de CPU por servidor:")
         for sid, uso in utilizacoes.items():
             print(f"  - Servidor {sid}: {uso*100:.1f}%")
         print(f"Utilização média da CPU (cluster): {utilizacao_media*100:.1f}%")
 
+        metricas_pools = None
+        if pools:
+            print()
+            modo_pools = "dois níveis" if usar_pools else "fila única, só agrupamento"
+            print(f"Pools de servidores ({modo_pools}) - utilização / resposta média / p95:")
+            metricas_pools = {}
+            for p in pools:
+                respostas = [r for tipo in p.tipos for r in respostas_por_tipo.get(tipo, [])]
+                usos = [utilizacoes[sid] for sid in p.servidores if sid in utilizacoes]
+                metricas_pools[p.nome] = {
+                    "servidores": list(p.servidores),
+                    "tipos": list(p.tipos),
+                    "tarefas": len(respostas),
+                    "utilizacao_media_cpu": round(sum(usos) / len(usos) * 100, 1) if usos else 0.0,
+                    "tempo_medio_resposta": round(sum(respostas) / len(respostas), 2) if respostas else 0.0,
+                    "tempo_resposta_p95": round(percentil(respostas, 95), 2),
+                    "transbordadas": estado_pools[p.nome]["transbordadas"],
+                }
+                m = metricas_pools[p.nome]
+                print(
+                    f"  - {p.nome:<10}: {m['utilizacao_media_cpu']:.1f}% / {m['tempo_medio_resposta']:.2f}s / "
+                    f"{m['tempo_resposta_p95']:.2f}s ({m['tarefas']} tarefas, {m['transbordadas']} transbordadas)"
+                )
+
+        metricas_custo = {
+            "servidor_segundos": round(contadores.servidor_segundos, 1),
+            "servidores_medio": round(contadores.servidor_segundos / tempo_total_simulacao, 2),
+            "pico_servidores": pico_servidores,
+            "servidor_segundos_por_tarefa": round(contadores.servidor_segundos / contadores.tasks_finalizadas, 2),
+            "utilizacao_efetiva": round(
+                min(1.0, sum(contadores.tempo_execucao_por_servidor.values()) / contadores.servidor_segundos) * 100
+                if contadores.servidor_segundos else 0.0, 1
+            ),
+        }
+        print()
+        print(
+            f"Custo: {metricas_custo['servidor_segundos']:.1f} servidor-segundos "
+            f"({metricas_custo['servidor_segundos_por_tarefa']:.2f} por tarefa; média de "
+            f"{metricas_custo['servidores_medio']:.2f} servidores, pico de {pico_servidores})"
+        )
+        print(
+            f"Custo × latência                 : resposta média {tempo_medio_resposta:.2f}s, "
+            f"p95 {percentil(todas_respostas, 95):.2f}s, utilização efetiva {metricas_custo['utilizacao_efetiva']:.1f}%"
+        )
+        if autoescala is not None:
+            provisionados = sum(1 for e in eventos_escala if e["acao"] == "provisionar")
+            print(f"Autoescala: {provisionados} provisionamentos, {len(eventos_escala) - provisionados} desligamentos")
+
+        latencia_por_cliente = None
+        if cfg_clientes.get("habilitado"):
+            print()
+            modo_clientes = "fila justa DRR" if fila_justa is not None else "fila única"
+            print(f"Clientes ({modo_clientes}) - throughput / média / p95 / p99:")
+            latencia_por_cliente = {}
+            for cliente, respostas in sorted(respostas_por_cliente.items()):
+                latencia_por_cliente[cliente] = {
+                    "peso": pesos_clientes.get(cliente, 1.0),
+                    **resumo_latencias(respostas),
+                    "throughput": round(len(respostas) / tempo_total_simulacao, 2),
+                }
+                lat = latencia_por_cliente[cliente]
+                print(
+                    f"  - {cliente:<10}: {lat['throughput']:.2f} tarefas/s / {lat['media']:.2f}s / "
+                    f"{lat['p95']:.2f}s / {lat['p99']:.2f}s ({lat['tarefas']} tarefas)"
+                )
+
+        if perfil.habilitado:
+            perfil.imprimir()
+
         metricas = {
+            "execucao": execucao_id,
             "politica": politica,
-            "tarefas_processadas": tasks_finalizadas,
+            "tarefas_processadas": contadores.tasks_finalizadas,
             "tempo_total_simulacao": round(tempo_total_simulacao, 2),
             "tempo_medio_espera": round(tempo_medio_espera, 2),
-            "tempo_maximo_espera": round(tempo_espera_max, 2),
+            "tempo_maximo_espera": round(contadores.tempo_espera_max, 2),
             "tempo_medio_execucao": round(tempo_medio_execucao, 2),
             "tempo_medio_resposta": round(tempo_medio_resposta, 2),
             "throughput": round(throughput, 2),
             "utilizacao_media_cpu": round(utilizacao_media * 100, 1),
+            "tarefas_reenviadas": contadores.tarefas_reenviadas,
+            "servidores_falhos": contadores.servidores_falhos,
+            "instante_primeiro_despacho": contadores.instante_primeiro_despacho,
+            "tempo_preparacao_servidores": round(tempo_preparacao, 4),
+            "tempo_encerramento_servidores": round(tempo_encerramento, 4),
+            "preempcoes": contadores.preempcoes,
+            "tempo_resposta_p95": round(percentil(todas_respostas, 95), 2),
+            "tempo_resposta_p99": round(percentil(todas_respostas, 99), 2),
+            "latencia_por_tipo": latencia_por_tipo,
             "utilizacao_por_servidor": {
                 sid: round(uso * 100, 1) for sid, uso in utilizacoes.items()
             }
         }
+        if metricas_lote is not None:
+            metricas["lote"] = metricas_lote
+        if metricas_cache is not None:
+            metricas["cache"] = metricas_cache
+        if metricas_pools is not None:
+            metricas["pools"] = metricas_pools
+        if latencia_por_cliente is not None:
+            metricas["fila_justa"] = fila_justa is not None
+            metricas["latencia_por_cliente"] = latencia_por_cliente
+        if perfil.habilitado:
+            metricas["perfil"] = perfil.resumo()
+        if checkpoint is not None:
+            metricas["checkpoint"] = {**checkpoint.resumo(), "retomada": retomada is not None}
+        metricas["custo"] = metricas_custo
+        if autoescala is not None:
+            metricas["autoescala"] = {
+                "min_servidores": autoescala.min_servidores,
+                "max_servidores": autoescala.max_servidores,
+                "servidores_criados": criados_autoescala,
+                "eventos": eventos_escala,
+            }
 
-        salvar_metricas(metricas)
+        if contexto_shard is None:
+            salvar_metricas(metricas, config_extra.get("arquivo_metricas", "metricas.json"))
+            if escritor is not None:
+                registrar_execucao(metricas, execucao_id, inicio_simulacao, pasta_armazem)
+        else:
+            metricas["requisicoes_repassadas"] = contadores.requisicoes_repassadas
     else:
+        metricas = None
         print("Nenhum processamento realizado.")
 
     print("-" * 60)
 
+    if escritor is not None:
+        escritor.fechar({"execucao": execucao_id, "politica": politica})
+
+    if contexto_shard is not None:
+        contexto_shard["fila_metricas"].put((contexto_shard["id"], metricas, respostas_por_tipo, respostas_por_cliente))
+    return metricas
 
-def main():
-    servidores, tipos_requisicoes, cfg = carregar_config("config.json")
+
+def executar_com_shards(servidores: List[Servidor],
+                        tipos_requisicoes: List[TipoRequisicao],
+                        config_extra: Dict,
+                        fila_entrada: multiprocessing.Queue,
+                        tempo_simulacao: int,
+                        inicio_simulacao: float):
+    cfg_shards = config_extra.get("sharding", {})
+    ativos = [s for s in servidores if s.status == "ativo"]
+    num_shards = max(1, min(cfg_shards.get("shards", 1), len(ativos)))
+
+    particoes = [ativos[i::num_shards] for i in range(num_shards)]
+    filas_shards = [multiprocessing.Queue() for _ in range(num_shards)]
+    cargas_shards = multiprocessing.Array("d", num_shards)
+    doacoes = multiprocessing.Value("i", 0)
+    finalizados = multiprocessing.Array("b", num_shards)
+    lock_shards = multiprocessing.Lock()
+    fila_metricas = multiprocessing.Queue()
+
+    print(f"[{format_tempo_relativo(inicio_simulacao)}] [ORQ] Modo shard: {num_shards} orquestradores.")
+    for i, particao in enumerate(particoes):
+        print(f"  - Shard {i}: servidores {[s.id for s in particao]}")
+
+    roteador = multiprocessing.Process(
+        target=roteador_shards,
+        args=(fila_entrada, filas_shards, cfg_shards.get("roteamento", "hash"), cargas_shards, inicio_simulacao),
+    )
+    roteador.start()
+
+    shards = []
+    for i, particao in enumerate(particoes):
+        contexto = {
+            "id": i,
+            "filas": filas_shards,
+            "cargas": cargas_shards,
+            "doacoes": doacoes,
+            "finalizados": finalizados,
+            "lock": lock_shards,
+            "capacidades": [sum(s.capacidade for s in p) or 1 for p in particoes],
+            "limiar": cfg_shards.get("limiar_rebalanceamento", 0.5),
+            "fila_metricas": fila_metricas,
+        }
+        p = multiprocessing.Process(
+            target=orquestrador,
+            args=(particao, tipos_requisicoes, config_extra, filas_shards[i],
+                  tempo_simulacao, inicio_simulacao, contexto),
+        )
+        p.start()
+        shards.append(p)
+
+    # Um shard que morre antes de enviar as métricas não pode travar o processo principal
+    parciais = []
+    pendentes = dict(enumerate(shards))
+    sem_processo = set()
+    while pendentes:
+        try:
+            parcial = fila_metricas.get(timeout=1.0)
+            parciais.append(parcial)
+            pendentes.pop(parcial[0], None)
+            continue
+        except queue.Empty:
+            pass
+        for i, p in list(pendentes.items()):
+            if p.is_alive():
+                continue
+            if i not in sem_processo:
+                # as métricas podem ainda estar a caminho; espera mais um intervalo
+                sem_processo.add(i)
+                continue
+            del pendentes[i]
+            with lock_shards:
+                # nenhum outro shard repassa mais requisições para ele
+                finalizados[i] = 1
+            perdidas = doadas = 0
+            try:
+                while True:
+                    task = filas_shards[i].get(timeout=0.1)
+                    if task is None:
+                        continue
+                    perdidas += 1
+                    doadas += task.doada
+            except queue.Empty:
+                pass
+            if doadas:
+                # libera os shards que aguardam as doações pendentes para encerrar
+                with doacoes.get_lock():
+                    doacoes.value -= doadas
+            print(
+                f"[{format_tempo_relativo(inicio_simulacao)}] [ORQ] Shard {i} encerrou sem enviar métricas "
+                f"(exitcode {p.exitcode}); {perdidas} requisições na sua fila foram perdidas."
+            )
+    for p in shards:
+        p.join()
+    roteador.join()
+
+    metricas = combinar_metricas_shards(sorted(parciais, key=lambda x: x[0]))
+
+    print("\n" + "=" * 60)
+    print(f"        === Relatório Consolidado ({num_shards} shards) ===")
+    print("=" * 60)
+
+    if metricas is None:
+        print("Nenhum processamento realizado.")
+        return
+
+    print(f"Total de tarefas processadas     : {metricas['tarefas_processadas']}")
+    print(f"Tempo total de simulação         : {metricas['tempo_total_simulacao']:.2f}s")
+    print(f"Tempo médio de espera na fila    : {metricas['tempo_medio_espera']:.2f}s")
+    print(f"Tempo médio de resposta          : {metricas['tempo_medio_resposta']:.2f}s")
+    print(f"Throughput                       : {metricas['throughput']:.2f} tarefas/segundo")
+    print(f"Requisições repassadas entre shards: {metricas['requisicoes_repassadas']}")
+    for sid, parcial in metricas["por_shard"].items():
+        print(f"  - Shard {sid}: {parcial['tarefas_processadas']} tarefas ({parcial['throughput']:.2f}/s)")
+    print(f"Utilização média da CPU (cluster): {metricas['utilizacao_media_cpu']:.1f}%")
+    if "lote" in metricas:
+        print(f"Lotes executados                 : {metricas['lote']['lotes_executados']} "
+              f"(tamanho médio {metricas['lote']['tamanho_medio']:.2f})")
+    for nome, p in metricas.get("pools", {}).items():
+        print(f"  - Pool {nome}: {p['utilizacao_media_cpu']:.1f}% / {p['tempo_medio_resposta']:.2f}s / "
+              f"p95 {p['tempo_resposta_p95']:.2f}s ({p['tarefas']} tarefas, {p['transbordadas']} transbordadas)")
+    for cliente, lat in metricas.get("latencia_por_cliente", {}).items():
+        print(f"  - Cliente {cliente}: {lat['throughput']:.2f} tarefas/s / {lat['media']:.2f}s / "
+              f"p95 {lat['p95']:.2f}s ({lat['tarefas']} tarefas)")
+    if "cache" in metricas:
+        c = metricas["cache"]
+        print(f"Cache - acertos / coalescidas / faltas: {c['acertos']} / {c['coalescidas']} / {c['faltas']} "
+              f"(taxa de acerto {c['taxa_acerto']:.1f}%)")
+    if "custo" in metricas:
+        c = metricas["custo"]
+        print(f"Custo                            : {c['servidor_segundos']:.1f} servidor-segundos "
+              f"({c['servidor_segundos_por_tarefa']:.2f} por tarefa; pico de {c['pico_servidores']} servidores)")
+    print("=" * 60)
+
+    salvar_metricas(metricas, config_extra.get("arquivo_metricas", "metricas.json"))
+    cfg_armazem = config_extra.get("armazem", {})
+    if cfg_armazem.get("habilitado", True):
+        registrar_execucao(metricas, config_extra.get("execucao_id", int(inicio_simulacao * 1e6)),
+                           inicio_simulacao, cfg_armazem.get("pasta", str(PASTA_ARMAZEM)))
+
+
+def valor_argumento(nome: str, padrao: str, argv: Optional[List[str]] = None) -> str:
+    argv = sys.argv if argv is None else argv
+    if nome in argv:
+        idx = argv.index(nome)
+        if idx + 1 < len(argv):
+            return argv[idx + 1]
+    return padrao
+
+
+def main(argv: Optional[List[str]] = None, pool: Optional[PoolServidores] = None):
+    """
+    Ponto de entrada da simulação. argv segue o formato da linha de comando
+    (--auto, --config, --metricas, --execucao, --trace, --retomar); quando omitido,
+    usa sys.argv.
+    Permite que o launcher e o comparador rodem simulações no mesmo processo;
+    com um PoolServidores, os processos de servidor são reaproveitados entre elas
+    (exceto no modo com shards, em que cada shard cria os seus).
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    servidores, tipos_requisicoes, cfg = carregar_config(valor_argumento("--config", "config.json", argv))
+    cfg["arquivo_metricas"] = valor_argumento("--metricas", cfg.get("arquivo_metricas", "metricas.json"), argv)
+    cfg["execucao_id"] = int(valor_argumento("--execucao", str(time.time_ns() // 1000), argv))
+    cfg["arquivo_trace"] = valor_argumento("--trace", cfg.get("arquivo_trace", ""), argv)
     
-    if "--auto" in sys.argv:
+    if "--auto" in argv:
         print(f"Modo automático detectado. Usando política: {cfg.get('politica')}")
     else:
         menu = MenuTerminal()
-        opcoes = ["Round Robin", "SJF", "Prioridade"]
-        mapa = ["round_robin", "sjf", "prioridade"]
+        opcoes = ["Round Robin", "SJF", "Prioridade", "Round Robin com Quantum", "SRTF"]
+        mapa = ["round_robin", "sjf", "prioridade", "round_robin_quantum", "srtf"]
         
         try:
             idx = menu.selecionar("BSB Compute - Modo Manual", opcoes)
@@ -573,15 +2900,66 @@ def main():
     inicio_global = time.time()
     fila_entrada = multiprocessing.Queue()
     num_workers = len([s for s in servidores if s.status == "ativo"])
+    retomada = None
+    proximo_id, decorrido = 1, 0.0
+
+    if "--retomar" in argv:
+        cfg_checkpoint = cfg.get("checkpoint", {})
+        pasta_checkpoint = cfg_checkpoint.get("pasta", str(PASTA_CHECKPOINT))
+        # Sem --execucao, retoma a execução com o snapshot mais recente
+        execucao_pedida = valor_argumento("--execucao", "", argv)
+        pasta_retomada = localizar_checkpoint(pasta_checkpoint, int(execucao_pedida) if execucao_pedida else None)
+        retomada = carregar_checkpoint(pasta_retomada) if pasta_retomada is not None else None
+        if retomada is None:
+            alvo = f"da execução {execucao_pedida} " if execucao_pedida else ""
+            print(f"Nenhum checkpoint {alvo}para retomar em {pasta_checkpoint}.")
+            return
+        if cfg.get("sharding", {}).get("shards", 1) > 1:
+            print("A retomada de checkpoint não é suportada no modo com shards.")
+            return
+
+        # O relógio da simulação continua de onde parou: o intervalo em que o
+        # processo ficou fora do ar é descontado de todos os instantes salvos
+        estado = retomada["estado"]
+        decorrido = retomada["instante"] - estado["inicio_simulacao"]
+        inicio_global = time.time() - decorrido
+        retomada["deslocamento"] = inicio_global - estado["inicio_simulacao"]
+        proximo_id = retomada["proximo_id"]
+        cfg["execucao_id"] = estado["execucao_id"]
+        cfg["checkpoint"] = {**cfg_checkpoint, "habilitado": True}
+        print(
+            f"Retomando a execução {estado['execucao_id']} ({pasta_retomada}) "
+            f"a partir de {decorrido:.1f}s de simulação."
+        )
+
+        # Chegadas posteriores ao snapshot passam de novo pela entrada do orquestrador
+        for dados in retomada["chegadas"]:
+            dados["servidores_excluidos"] = tuple(dados["servidores_excluidos"])
+            fila_entrada.put(deslocar_tarefa(Task(**dados), retomada["deslocamento"]))
 
     gerador = multiprocessing.Process(
         target=gerador_requisicoes,
-        args=(tipos_requisicoes, cfg, fila_entrada, TEMPO_SIMULACAO, inicio_global, num_workers),
+        args=(tipos_requisicoes, cfg, fila_entrada, TEMPO_SIMULACAO, inicio_global, num_workers,
+              proximo_id, decorrido),
     )
     gerador.start()
-    orquestrador(servidores, tipos_requisicoes, cfg, fila_entrada, TEMPO_SIMULACAO, inicio_global)
+    if cfg.get("sharding", {}).get("shards", 1) > 1:
+        executar_com_shards(servidores, tipos_requisicoes, cfg, fila_entrada, TEMPO_SIMULACAO, inicio_global)
+    else:
+        orquestrador(servidores, tipos_requisicoes, cfg, fila_entrada, TEMPO_SIMULACAO, inicio_global,
+                     pool=pool, retomada=retomada)
     gerador.join()
 
+    if cfg["arquivo_trace"]:
+        cfg_armazem = cfg.get("armazem", {})
+        if not cfg_armazem.get("habilitado", True):
+            print("Trace não exportado: o armazém de resultados está desabilitado.")
+        else:
+            exportadas = exportar_trace_chrome(
+                cfg["execucao_id"], cfg["arquivo_trace"], cfg_armazem.get("pasta", str(PASTA_ARMAZEM))
+            )
+            print(f"Trace com {exportadas} requisições exportado para {cfg['arquivo_trace']}")
+
 
 if __name__ == "__main__":
     if os.name == 'nt':
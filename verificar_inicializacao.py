@@ -0,0 +1,129 @@
+"""
+Verificação do orçamento de inicialização da simulação.
+
+Mede, com python -X importtime, o custo de importar main.py e launcher.py e confere
+que nenhum dos dois carrega NumPy ou matplotlib. Em seguida executa uma simulação
+curta e mede o tempo entre o lançamento do processo e o primeiro despacho de tarefa
+(campo instante_primeiro_despacho do metricas.json).
+
+Uso: python verificar_inicializacao.py [--config config.json]
+O código de saída é 1 se algum orçamento for excedido.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+ORCAMENTO_IMPORTACAO_MS = {"main": 150.0, "launcher": 150.0}
+ORCAMENTO_PRIMEIRO_DESPACHO_MS = 1500.0
+MODULOS_PROIBIDOS = ("numpy", "matplotlib")
+
+
+def medir_importacao(modulo: str) -> Tuple[float, List[Tuple[str, float]]]:
+    """
+    Retorna o tempo total de importação do módulo (ms) e os módulos importados
+    por ele com o tempo acumulado de cada um, do mais caro para o mais barato.
+    """
+    saida = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        capture_output=True, text=True, check=True,
+    ).stderr
+
+    # As dependências de um módulo aparecem indentadas logo antes da linha dele;
+    # os módulos da inicialização do interpretador (site, encodings...) ficam de fora.
+    importados = []
+    bloco = []
+    total_ms = 0.0
+    for linha in saida.splitlines():
+        if not linha.startswith("import time:") or "|" not in linha:
+            continue
+        _, acumulado, nome = linha.split("|")
+        if not acumulado.strip().isdigit():
+            continue
+        ms = int(acumulado) / 1000
+        if nome[1:].startswith(" "):
+            bloco.append((nome.strip(), ms))
+        elif nome.strip() == modulo:
+            importados, total_ms = bloco, ms
+        else:
+            bloco = []
+
+    importados.sort(key=lambda item: item[1], reverse=True)
+    return total_ms, importados
+
+
+def medir_primeiro_despacho(arquivo_config: str) -> float:
+    with open(arquivo_config, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    config["config"].update({
+        "tempo_simulacao": 2,
+        "intervalo_chegada_min": 0.0,
+        "intervalo_chegada_max": 0.05,
+        "armazem": {"habilitado": False},
+    })
+
+    with tempfile.TemporaryDirectory() as pasta:
+        config_curta = os.path.join(pasta, "config.json")
+        arquivo_metricas = os.path.join(pasta, "metricas.json")
+        with open(config_curta, "w", encoding="utf-8") as f:
+            json.dump(config, f, ensure_ascii=False)
+
+        inicio = time.time()
+        subprocess.run(
+            [sys.executable, "main.py", "--auto", "--config", config_curta, "--metricas", arquivo_metricas],
+            stdout=subprocess.DEVNULL, check=True,
+        )
+        with open(arquivo_metricas, "r", encoding="utf-8") as f:
+            metricas = json.load(f)
+
+    instante = metricas.get("instante_primeiro_despacho")
+    return (instante - inicio) * 1000 if instante else float("inf")
+
+
+def main():
+    arquivo_config = "config.json"
+    if "--config" in sys.argv and sys.argv.index("--config") + 1 < len(sys.argv):
+        arquivo_config = sys.argv[sys.argv.index("--config") + 1]
+
+    print("=" * 60)
+    print("  ORÇAMENTO DE INICIALIZAÇÃO")
+    print("=" * 60)
+
+    dentro_do_orcamento = True
+    resultados: Dict[str, float] = {}
+
+    for modulo, orcamento in ORCAMENTO_IMPORTACAO_MS.items():
+        total_ms, importados = medir_importacao(modulo)
+        resultados[modulo] = total_ms
+        proibidos = sorted({n for n, _ in importados if n.split(".")[0] in MODULOS_PROIBIDOS})
+
+        ok = total_ms <= orcamento and not proibidos
+        dentro_do_orcamento &= ok
+        print(f"\n[{'OK' if ok else 'FALHOU'}] import {modulo}: {total_ms:.1f} ms (orçamento {orcamento:.0f} ms)")
+        for nome, ms in importados[:5]:
+            print(f"    {ms:8.1f} ms  {nome}")
+        if proibidos:
+            print(f"    Módulos pesados carregados na inicialização: {', '.join(proibidos)}")
+
+    primeiro_ms = medir_primeiro_despacho(arquivo_config)
+    resultados["primeiro_despacho"] = primeiro_ms
+    ok = primeiro_ms <= ORCAMENTO_PRIMEIRO_DESPACHO_MS
+    dentro_do_orcamento &= ok
+    print(
+        f"\n[{'OK' if ok else 'FALHOU'}] Lançamento até o primeiro despacho: {primeiro_ms:.1f} ms "
+        f"(orçamento {ORCAMENTO_PRIMEIRO_DESPACHO_MS:.0f} ms)"
+    )
+
+    os.makedirs("resultados", exist_ok=True)
+    with open(os.path.join("resultados", "inicializacao.json"), "w", encoding="utf-8") as f:
+        json.dump({k: round(v, 1) for k, v in resultados.items()}, f, indent=2, ensure_ascii=False)
+
+    print("=" * 60)
+    sys.exit(0 if dentro_do_orcamento else 1)
+
+
+if __name__ == "__main__":
+    main()